@@ -1,51 +1,23 @@
 import streamlit as st
 import pandas as pd
-import requests
 import json
 import time
 from datetime import datetime
 import os
 from bs4 import BeautifulSoup
-import re
 import glob
-import urllib3
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-
-# Disable SSL warnings
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-
-def create_session():
-    """Returns a configured requests.Session object with retries."""
-    session = requests.Session()
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-        'Referer': 'https://urban2025.tsec.gov.in/slNoWardWiseVoterlisturbanMapped.do',
-        'Origin': 'https://urban2025.tsec.gov.in',
-    }
-    
-    session.headers.update(headers)
-    session.verify = False
-    
-    retry_strategy = Retry(
-        total=5,
-        connect=5,
-        read=5,
-        backoff_factor=2,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["HEAD", "GET", "POST", "OPTIONS"]
-    )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
-    session.mount("https://", adapter)
-    session.mount("http://", adapter)
-    
-    return session
+import multiprocessing
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+import connection
+from jobs import JobService
+from pdf_tools import page_tasks, parse_pages, merge_pdfs
+from browser_auth import BrowserAuthProvider, BrowserAuthError
+from bundle import ZipBundle, part_filename, part_rows
+from scheduler import TimingHistory, WorkStealingScheduler, DEFAULT_PARTS_PER_WARD, naive_makespan, lpt_makespan
+from summary import SummaryAccumulator, typed_voters, AGE_LABELS
+from spool import spool_upload, spool_response, spool_name, output_path, state_path, prune_spool
 
 # Set page config
 st.set_page_config(
@@ -69,6 +41,11 @@ if 'download_results' not in st.session_state:
     st.session_state['download_results'] = []
 
 BASE_URL = "https://urban2025.tsec.gov.in"
+JOB_WORKERS = 4
+LOOKUP_WORKERS = 4
+SWEEP_DOWNLOAD_WORKERS = 4
+# Every thread that can share one session (lookups, job workers, sweep downloaders) keeps its own connection
+SESSION_POOL_SIZE = LOOKUP_WORKERS + max(JOB_WORKERS, SWEEP_DOWNLOAD_WORKERS)
 
 # --- Helper Functions ---
 def log_request(url, params=None):
@@ -85,11 +62,11 @@ def get_session():
     if 'session' not in st.session_state:
         status_text = st.empty()
         status_text.info("Initializing secure session...")
-        session = create_session()  # Use embedded function
+        session = connection.get_session(pool_maxsize=SESSION_POOL_SIZE)
         try:
             root_url = "https://urban2025.tsec.gov.in/"
             log_request(root_url, "Warming up session...")
-            session.get(root_url, timeout=30)
+            session.get(root_url)
             status_text.success("Session initialized!")
             time.sleep(1)
             status_text.empty()
@@ -101,13 +78,37 @@ def get_session():
         
     return st.session_state['session']
 
+@st.cache_resource
+def get_job_service():
+    """Process-wide service for long jobs (downloads, sweeps, extraction) shared by every browser session."""
+    return JobService(max_workers=JOB_WORKERS)
+
+@st.cache_resource
+def get_lookup_service():
+    """
+    Separate small pool for the dropdown option lookups, so they are never
+    queued behind long jobs holding every worker in get_job_service().
+    """
+    return JobService(max_workers=LOOKUP_WORKERS)
+
+@st.cache_resource
+def get_auth_provider():
+    """Shared headless-browser authorization pool; the browser launches on first use."""
+    return BrowserAuthProvider(f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do")
+
+@st.cache_resource
+def get_parse_pool():
+    """Process pool for PDF parsing; workers receive spool paths, never PDF bytes."""
+    # spawn, not fork: the Streamlit server process is already multi-threaded
+    return ProcessPoolExecutor(max_workers=os.cpu_count() or 2, mp_context=multiprocessing.get_context("spawn"))
+
 def fetch_initial_data():
     """Fetch Elections and Districts from the main page HTML"""
     session = get_session()
     url = f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do"
     log_request(url)
     try:
-        response = session.get(url, timeout=30)
+        response = session.get(url)
         log_request(url, f"Status: {response.status_code}")
         if response.status_code == 200:
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -143,50 +144,66 @@ def fetch_initial_data():
 
     return [], []
 
-def fetch_municipalities(district_code):
+def _fetch_options(job, session, url, params):
+    """Worker: POSTs a dropdown query and returns (status_code, [(value, text), ...])."""
+    response = session.post(url, params=params)
+    options = []
+    if response.status_code == 200:
+        soup = BeautifulSoup(response.content, 'html.parser')
+        for opt in soup.find_all('option'):
+            val = opt.get('value')
+            if val and val != '0' and val != '':
+                options.append((val, opt.text.strip()))
+    return response.status_code, options
+
+def run_job(key, fn, *args, label="", progress_bar=None, status_text=None, service=None):
+    """
+    Submits work to `service` (the long-job service by default), joining an
+    identical in-flight job if one exists, and follows its progress until it finishes.
+    """
+    if service is None:
+        # Long jobs spool files; keep the spool bounded on long-running servers
+        prune_spool()
+        service = get_job_service()
+    job = service.submit(key, fn, *args, label=label)
+    try:
+        while not job.wait(timeout=0.25):
+            progress, message = job.snapshot()
+            if progress_bar is not None:
+                progress_bar.progress(progress)
+            if status_text is not None and message:
+                status_text.text(message)
+    finally:
+        # Also runs when Streamlit interrupts the script on a rerun or disconnect
+        job.leave()
+    return job.result()
+
+def fetch_options(kind, url, params):
     session = get_session()
-    url = f"{BASE_URL}/wardwisevoterlisturban.do"
-    params = {'mode': 'getMunicipality', 'district_id': district_code}
     log_request(url, params)
     try:
-        response = session.post(url, params=params, timeout=30)
-        log_request(url, f"Status: {response.status_code}")
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            options = []
-            for opt in soup.find_all('option'):
-                val = opt.get('value')
-                if val and val != '0':
-                    options.append({'id': val, 'name': opt.text.strip()})
-            return options
+        status_code, options = run_job(
+            (kind, url, tuple(sorted(params.items()))), _fetch_options, session, url, params,
+            service=get_lookup_service()
+        )
+        log_request(url, f"Status: {status_code}")
+        return options
     except Exception as e:
-        st.error(f"Error fetching municipalities: {e}")
+        st.error(f"Error fetching {kind}: {e}")
         log_request(url, f"Error: {e}")
     return []
 
+def fetch_municipalities(district_code):
+    url = f"{BASE_URL}/wardwisevoterlisturban.do"
+    params = {'mode': 'getMunicipality', 'district_id': district_code}
+    return [{'id': val, 'name': name} for val, name in fetch_options("municipalities", url, params)]
+
 def fetch_wards(district_code, municipality_code):
-    session = get_session()
     url = f"{BASE_URL}/wardwisevoterlisturban.do"
     params = {'mode': 'getWard', 'district_id': district_code, 'municipality_id': municipality_code}
-    log_request(url, params)
-    try:
-        response = session.post(url, params=params, timeout=30)
-        log_request(url, f"Status: {response.status_code}")
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            options = []
-            for opt in soup.find_all('option'):
-                val = opt.get('value')
-                if val and val != '0' and val != '':
-                    options.append({'id': val, 'name': opt.text.strip()})
-            return options
-    except Exception as e:
-        st.error(f"Error fetching wards: {e}")
-        log_request(url, f"Error: {e}")
-    return []
+    return [{'id': val, 'name': name} for val, name in fetch_options("wards", url, params)]
 
 def fetch_ac_parts(ward_code, municipality_code, district_code):
-    session = get_session()
     url = f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do"
     params = {
         'mode': 'getPartNos',
@@ -194,23 +211,286 @@ def fetch_ac_parts(ward_code, municipality_code, district_code):
         'municipality_id': municipality_code,
         'ward_id': ward_code
     }
-    log_request(url, params)
-    
+    return [{'partno': val} for val, _ in fetch_options("AC parts", url, params)]
+
+def part_link(election_code, district_code, muni_code, ward_code, part_no):
+    return (
+        f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do?"
+        f"mode=createViewInEnglishReport&"
+        f"election_id={election_code}&"
+        f"district_id={district_code}&"
+        f"mnc_id={muni_code}&"
+        f"ward_id={ward_code}&"
+        f"circle_id=0&"
+        f"part_no={part_no}"
+    )
+
+def authorize_session(session, auth_url, form_data, auth_provider=None):
+    """
+    Authorizes `session` for PDF downloads, via the browser pool when given.
+    Returns (auth_provider, auth_note); auth_provider is None if the browser could not be used.
+    """
+    auth_note = None
+    if auth_provider is not None:
+        try:
+            auth_provider.authorize(session, form_data)
+            return auth_provider, None
+        except Exception as e:
+            auth_note = f"{e}. Falling back to form authorization..."
+
+    # CRITICAL: Authorize the session first by submitting the form
     try:
-        response = session.post(url, params=params, timeout=30)
-        log_request(url, f"Status: {response.status_code}")
+        # First, visit the main page to get fresh cookies
+        session.get(auth_url)
+
+        auth_response = session.post(
+            auth_url,
+            data=form_data,
+            headers={'Content-Type': 'application/x-www-form-urlencoded', 'Referer': auth_url}
+        )
+        if auth_response.status_code != 200:
+            auth_note = f"Authorization returned {auth_response.status_code}. Downloads may fail."
+    except Exception as e:
+        auth_note = f"Session auth failed: {e}. Trying downloads anyway..."
+    return None, auth_note
+
+def download_part(session, pdf_url, filename, form_data, auth_provider=None):
+    """Downloads one part PDF into the spool. Returns (path, error)."""
+    try:
+        response = session.get(pdf_url, stream=True)
+
+        # Session expired: pick up (or harvest) fresh browser cookies and retry once
+        # A failed refresh is not retried for every remaining part
+        if auth_provider is not None and not auth_provider.failed and response.status_code == 200 and \
+                'pdf' not in response.headers.get('Content-Type', '').lower():
+            response.close()
+            try:
+                auth_provider.refresh(session, form_data)
+            except BrowserAuthError as e:
+                return None, str(e)[:50]
+            response = session.get(pdf_url, stream=True)
+
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            parts = []
-            for opt in soup.find_all('option'):
-                val = opt.get('value')
-                if val and val != '0' and val != '':
-                    parts.append({'partno': val})
-            return parts
+            content_type = response.headers.get('Content-Type', '')
+
+            if 'pdf' in content_type.lower():
+                return spool_response(filename, response), None
+            response.close()
+            return None, f"Not a PDF (got {content_type})"
+        response.close()
+        return None, f"HTTP {response.status_code}"
     except Exception as e:
-        st.error(f"Error fetching AC parts: {e}")
-        log_request(url, f"Error: {e}")
-    return []
+        return None, str(e)[:50]
+
+def download_parts(job, session, auth_url, form_data, rows, bundle_path=None, auth_provider=None):
+    """
+    Worker: authorizes the session and downloads every part PDF into the spool.
+    `rows` is a list of (ward_name, ward_code, part_no, url). Returns (pdfs, failed, auth_note)
+    where pdfs holds (filename, path) pairs. With `bundle_path`, each part is also
+    appended to a ZIP bundle there as soon as its download finishes. With
+    `auth_provider`, cookies come from the shared browser authorization pool and
+    are refreshed once whenever a download comes back as something other than a PDF.
+    """
+    pdfs = []
+    failed = []
+    total = len(rows)
+    job.update(done=0, total=total, message="Authorizing session with TSEC server...")
+    auth_provider, auth_note = authorize_session(session, auth_url, form_data, auth_provider)
+
+    # Closed (moved into place) on success, discarded if the job fails part-way
+    with (ZipBundle(bundle_path) if bundle_path else nullcontext()) as bundle:
+        for i, (ward_name, ward_code, part_no, pdf_url) in enumerate(rows):
+            job.update(message=f"Downloading Ward {ward_name} Part {part_no} ({i+1}/{total})...")
+            filename = f"ward{ward_name}_part{part_no}.pdf"
+            path, error = download_part(session, pdf_url, filename, form_data, auth_provider)
+            if path:
+                pdfs.append((filename, path))
+                if bundle is not None:
+                    bundle.add(ward_code, part_no, path)
+            else:
+                failed.append(f"Part {part_no}: {error}")
+
+            job.update(done=i + 1)
+
+    return pdfs, failed, auth_note
+
+def sweep_municipalities(job, session, election_code, district_code, municipalities, auth_provider=None):
+    """
+    Worker: discovers, downloads and parses every ward of several municipalities
+    (given as (code, name) pairs) on the makespan-aware scheduler. Discovery,
+    download and parse tasks overlap; the largest known work is dispatched first.
+    """
+    history = TimingHistory(state_path("timings.json"))
+    sched = WorkStealingScheduler(
+        {'download': (SWEEP_DOWNLOAD_WORKERS, ('parse',)), 'parse': (os.cpu_count() or 2, ())},
+        history=history
+    )
+    options_url = f"{BASE_URL}/wardwisevoterlisturban.do"
+    auth_url = f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do"
+    form_data = {
+        'mode': 'getWardWiseData',
+        'property(election_id)': election_code,
+        'property(district_id)': district_code,
+        'property(municipality_id)': municipalities[0][0],
+        'property(ward_id)': '1',
+        'property(part_no)': '1'
+    }
+    job.update(message="Authorizing session with TSEC server...")
+    auth_provider, auth_note = authorize_session(session, auth_url, form_data, auth_provider)
+
+    lock = threading.Lock()
+    counts = {'done': 0, 'total': 0}
+    rows, voters, failed = [], [], []
+    summary = SummaryAccumulator()
+    bundle = ZipBundle(output_path(spool_name("sweep", [f"{election_code}/{district_code}/{m}" for m, _ in municipalities], suffix=".zip")))
+
+    def submit(pool, key, cost, fn, *args, **kwargs):
+        with lock:
+            counts['total'] += 1
+            job.update(total=counts['total'])
+        sched.submit(pool, key, cost, fn, *args, **kwargs)
+
+    def advance(message):
+        with lock:
+            counts['done'] += 1
+            job.update(done=counts['done'], message=message)
+
+    def discover_muni(muni_code, muni_name):
+        params = {'mode': 'getWard', 'district_id': district_code, 'municipality_id': muni_code}
+        _, wards = _fetch_options(job, session, options_url, params)
+        history.set_muni_wards(muni_code, [ward_code for ward_code, _ in wards])
+        for ward_code, ward_name in wards:
+            cost = history.ward_parts(muni_code, ward_code) * history.per_part('download')
+            submit('download', ('parts', muni_code, ward_code), cost, discover_ward,
+                   muni_code, muni_name, ward_code, ward_name, rank=0)
+        advance(f"Found {len(wards)} wards in {muni_name}")
+
+    def discover_ward(muni_code, muni_name, ward_code, ward_name):
+        params = {'mode': 'getPartNos', 'district_id': district_code, 'municipality_id': muni_code, 'ward_id': ward_code}
+        _, parts = _fetch_options(job, session, auth_url, params)
+        part_nos = [part_no for part_no, _ in parts]
+        history.set_ward_parts(muni_code, ward_code, len(part_nos))
+        if part_nos:
+            submit('download', ('download', muni_code, ward_code), len(part_nos) * history.per_part('download'),
+                   download_ward, muni_code, muni_name, ward_code, ward_name, part_nos, parts=len(part_nos))
+        else:
+            with lock:
+                rows.append({'Municipality': muni_name, 'Ward Name': ward_name, 'Ward Code': ward_code,
+                             'AC Part No': "N/A", 'Status': "No Data Found", 'Filename': "-"})
+        advance(f"{muni_name} ward {ward_name}: {len(part_nos)} parts")
+
+    def download_ward(muni_code, muni_name, ward_code, ward_name, part_nos):
+        files = []
+        for part_no in part_nos:
+            filename = part_filename(ward_code, part_no)
+            link = part_link(election_code, district_code, muni_code, ward_code, part_no)
+            path, error = download_part(session, link, filename, form_data, auth_provider)
+            if path:
+                files.append((filename, path))
+                bundle.add(ward_code, part_no, path, folder=f"municipality{muni_code}")
+            with lock:
+                rows.append({'Municipality': muni_name, 'Ward Name': ward_name, 'Ward Code': ward_code,
+                             'AC Part No': part_no, 'Status': "Downloaded" if path else f"Failed: {error}",
+                             'Link': link, 'Filename': filename})
+                if error:
+                    failed.append(f"{muni_name} ward {ward_code} part {part_no}: {error}")
+        if files:
+            submit('parse', ('parse', muni_code, ward_code), len(files) * history.per_part('parse'),
+                   parse_ward, muni_code, muni_name, ward_code, files, parts=len(files))
+        advance(f"Downloaded {muni_name} ward {ward_name} ({len(files)}/{len(part_nos)} parts)")
+
+    def parse_ward(muni_code, muni_name, ward_code, files):
+        pool = get_parse_pool()
+        futures = [pool.submit(parse_pages, *task) for name, path in files for task in page_tasks(name, path)]
+        ward_voters = []
+        for future in futures:
+            batch, error = future.result()
+            ward_voters.extend(batch)
+            if error:
+                with lock:
+                    failed.append(error)
+        # Ward codes repeat across municipalities; qualify them so the Summary and All Voters sheets join
+        for voter in ward_voters:
+            voter['Municipality'] = muni_name
+            voter['Ward'] = f"{muni_name} / {ward_code}"
+        batch = pd.DataFrame.from_records(ward_voters)
+        with lock:
+            voters.extend(ward_voters)
+            summary.add(batch)
+        advance(f"Parsed {muni_name} ward {ward_code}: {len(ward_voters)} voters")
+
+    for muni_code, muni_name in municipalities:
+        known = history.muni_parts(muni_code)
+        cost = (known if known is not None else DEFAULT_PARTS_PER_WARD) * history.per_part('download')
+        submit('download', ('wards', muni_code), cost, discover_muni, muni_code, muni_name, rank=0)
+
+    with bundle:
+        sched.run()
+    history.save()
+    for key, error in sched.errors.items():
+        failed.append(f"{key}: {error}")
+
+    # Compare against today's order: whole municipalities, one per worker, in dict order
+    ward_costs = {}
+    for key, (_, seconds) in sched.durations.items():
+        if key[0] in ('download', 'parse'):
+            ward_costs.setdefault(key[1], {}).setdefault(key[2], 0.0)
+            ward_costs[key[1]][key[2]] += seconds
+    per_muni = [list(ward_costs.get(code, {}).values()) for code, _ in municipalities]
+    workers = SWEEP_DOWNLOAD_WORKERS + (os.cpu_count() or 2)
+
+    return {
+        'rows': rows,
+        'voters': voters,
+        'summary': summary.result(),
+        'failed': failed,
+        'auth_note': auth_note,
+        'bundle_path': bundle.path if bundle.count else None,
+        'makespan': sched.makespan,
+        'naive_makespan': naive_makespan(per_muni, workers),
+        'lpt_makespan': lpt_makespan(per_muni, workers),
+        'steals': sched.steals,
+    }
+
+def extract_voters(job, files, mode="grid"):
+    """
+    Worker: fans spooled PDFs given as (name, path) pairs out to the parse
+    process pool in page ranges. Per-ward summaries are accumulated as each
+    batch of records arrives. `mode` is a pdf_tools extraction mode.
+    Returns (all_voters, errors, summary).
+    """
+    tasks = []
+    errors = []
+    for name, path in files:
+        try:
+            tasks.extend(page_tasks(name, path))
+        except Exception as e:
+            errors.append(f"⚠️ Error processing {name}: {e}")
+    
+    all_voters = []
+    summary = SummaryAccumulator()
+    job.update(done=0, total=len(tasks))
+    pool = get_parse_pool()
+    futures = [pool.submit(parse_pages, *task, mode) for task in tasks]
+    
+    # Collect in submission order so records keep their file/page order
+    for i, (task, future) in enumerate(zip(tasks, futures)):
+        job.update(message=f"Processing {task[0]} pages {task[2] + 1}-{task[3]} ({i + 1}/{len(tasks)})...")
+        voters, error = future.result()
+        all_voters.extend(voters)
+        summary.add(voters)
+        if error and error not in errors:
+            errors.append(error)
+        job.update(done=i + 1)
+    
+    return all_voters, errors, summary.result()
+
+def merge_job(job, paths, filename):
+    """Worker: merges spooled PDFs into a spooled output file."""
+    job.update(done=0, total=1, message=f"Merging {len(paths)} PDFs...")
+    out_path = merge_pdfs(paths, output_path(filename))
+    job.update(done=1)
+    return out_path
 
 # --- UI ---
 st.title("Telangana Urban Voter Data Extractor")
@@ -327,15 +607,8 @@ if st.button("Generate Excel Report", type="primary"):
             else:
                 for part in parts:
                     p_no = str(part['partno'])
-                    download_url = (
-                        f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do?"
-                        f"mode=createViewInEnglishReport&"
-                        f"election_id={selected_election_code}&"
-                        f"district_id={selected_district_code}&"
-                        f"mnc_id={selected_muni_code}&"
-                        f"ward_id={ward['code']}&"
-                        f"circle_id=0&"
-                        f"part_no={p_no}"
+                    download_url = part_link(
+                        selected_election_code, selected_district_code, selected_muni_code, ward['code'], p_no
                     )
                     
                     filename = f"voterlist_ward{ward['code']}_part{p_no}.pdf"
@@ -451,127 +724,117 @@ if st.session_state['download_results']:
     # --- In-Memory Download & Merge Section (Works on deployed apps) ---
     st.markdown("---")
     st.subheader("🚀 Auto-Download & Merge All PDFs")
-    st.markdown("Download all PDFs and merge them into a single file. Works on deployed apps!")
+    st.markdown("Download all PDFs and merge them into a single file, or bundle them into a ZIP (fastest for hundreds of parts). Works on deployed apps!")
     
     st.warning("⚠️ **Note:** The TSEC website may block automated downloads. If this fails, use the 'Upload & Merge' option below instead.")
     
-    if st.button("🚀 Download All & Merge into Single PDF", type="primary", key="auto_merge_btn"):
-        try:
-            from PyPDF2 import PdfMerger
-        except ImportError:
-            st.error("❌ PyPDF2 not installed. Run: `pip install PyPDF2`")
-            st.stop()
-        
-        from io import BytesIO
+    bulk_output = st.radio(
+        "Output",
+        ["Merge into Single PDF", "ZIP Bundle (per-ward folders, no merge)"],
+        horizontal=True,
+        key="bulk_output"
+    )
+    bundle_mode = bulk_output.startswith("ZIP")
+    use_browser_auth = st.checkbox(
+        "Authorize with headless browser (requires Chrome)",
+        key="use_browser_auth",
+        help="Launches a shared headless browser once to obtain valid TSEC cookies, then downloads over plain HTTP."
+    )
+    bulk_label = "🚀 Download All into ZIP Bundle" if bundle_mode else "🚀 Download All & Merge into Single PDF"
+    
+    if st.button(bulk_label, type="primary", key="auto_merge_btn"):
+        if not bundle_mode:
+            try:
+                from PyPDF2 import PdfMerger
+            except ImportError:
+                st.error("❌ PyPDF2 not installed. Run: `pip install PyPDF2`")
+                st.stop()
         
+        # "No Data Found" wards have no part to download
+        rows = part_rows(df)
+        if not rows:
+            st.warning("No downloadable parts in this report.")
+            st.stop()
+
         progress_bar = st.progress(0)
         status_text = st.empty()
         
         session = get_session()
-        pdf_buffers = []
-        failed_downloads = []
+        first_row = df[df['Link'].notna()].iloc[0]
+        auth_url = f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do"
         
-        # CRITICAL: Authorize the session first by submitting the form
-        status_text.text("Authorizing session with TSEC server...")
-        try:
-            first_row = df.iloc[0]
-            auth_url = f"{BASE_URL}/slNoWardWiseVoterlisturbanMapped.do"
-            
-            # First, visit the main page to get fresh cookies
-            session.get(auth_url, timeout=30)
-            
-            # Submit form to authorize PDF downloads
-            form_data = {
-                'mode': 'getWardWiseData',
-                'property(election_id)': first_row.get('Election', '186'),
-                'property(district_id)': first_row.get('District', '05'),
-                'property(municipality_id)': first_row.get('Municipality', '1'),
-                'property(ward_id)': first_row.get('Ward Code', '1'),
-                'property(part_no)': first_row.get('AC Part No', '1')
-            }
-            
-            session.headers.update({
-                'Content-Type': 'application/x-www-form-urlencoded',
-                'Referer': auth_url
-            })
-            
-            auth_response = session.post(auth_url, data=form_data, timeout=60)
-            
-            if auth_response.status_code == 200:
-                status_text.text("✅ Session authorized. Starting downloads...")
-            else:
-                st.warning(f"Authorization returned {auth_response.status_code}. Downloads may fail.")
-            
-            # Remove Content-Type for subsequent GET requests
-            if 'Content-Type' in session.headers:
-                del session.headers['Content-Type']
-                
-        except Exception as e:
-            st.warning(f"Session auth failed: {e}. Trying downloads anyway...")
+        # Submit form to authorize PDF downloads
+        form_data = {
+            'mode': 'getWardWiseData',
+            'property(election_id)': first_row.get('Election', '186'),
+            'property(district_id)': first_row.get('District', '05'),
+            'property(municipality_id)': first_row.get('Municipality', '1'),
+            'property(ward_id)': first_row.get('Ward Code', '1'),
+            'property(part_no)': first_row.get('AC Part No', '1')
+        }
         
-        total_parts = len(df)
-        for idx, row in df.iterrows():
-            part_no = row.get('AC Part No', idx)
-            ward_name = row.get('Ward Name', row.get('Ward Code', 'Unknown'))
-            status_text.text(f"Downloading Ward {ward_name} Part {part_no} ({idx+1}/{total_parts})...")
-            
-            pdf_url = row['Link']
-            
-            try:
-                response = session.get(pdf_url, timeout=60, stream=True)
-                
-                if response.status_code == 200:
-                    content_type = response.headers.get('Content-Type', '')
-                    
-                    if 'pdf' in content_type.lower():
-                        pdf_buffer = BytesIO(response.content)
-                        pdf_buffers.append((f"ward{ward_name}_part{part_no}.pdf", pdf_buffer))
-                    else:
-                        failed_downloads.append(f"Part {part_no}: Not a PDF (got {content_type})")
-                else:
-                    failed_downloads.append(f"Part {part_no}: HTTP {response.status_code}")
-            except Exception as e:
-                failed_downloads.append(f"Part {part_no}: {str(e)[:50]}")
-            
-            progress_bar.progress((idx + 1) / total_parts)
+        total_parts = len(rows)
+        links = [link for _, _, _, link in rows]
+        bundle_path = output_path(spool_name("bundle", links, suffix=".zip")) if bundle_mode else None
+        
+        # Sessions asking for the same set of links share one download sweep
+        job_key = ('download', tuple(links), bundle_mode, use_browser_auth)
+        auth_provider = get_auth_provider() if use_browser_auth else None
+        downloaded, failed_downloads, auth_note = run_job(
+            job_key, download_parts, session, auth_url, form_data, rows, bundle_path, auth_provider,
+            label=f"Download {total_parts} parts",
+            progress_bar=progress_bar, status_text=status_text
+        )
+        if auth_note:
+            st.warning(auth_note)
         
         progress_bar.empty()
         status_text.empty()
         
-        if pdf_buffers:
-            st.success(f"✅ Successfully downloaded {len(pdf_buffers)}/{total_parts} PDFs")
+        if downloaded:
+            st.success(f"✅ Successfully downloaded {len(downloaded)}/{total_parts} PDFs")
             
             if failed_downloads:
                 with st.expander(f"⚠️ {len(failed_downloads)} downloads failed"):
                     for fail in failed_downloads:
                         st.text(fail)
             
-            # Merge PDFs
-            try:
-                merger = PdfMerger()
-                for filename, pdf_buffer in pdf_buffers:
-                    pdf_buffer.seek(0)
-                    merger.append(pdf_buffer)
+            if bundle_mode:
+                first_ward = df.iloc[0].get('Ward Name', df.iloc[0].get('Ward Code', 'unknown'))
                 
-                merged_output = BytesIO()
-                merger.write(merged_output)
-                merger.close()
-                merged_output.seek(0)
+                with open(bundle_path, 'rb') as bundle_file:
+                    st.download_button(
+                        label=f"📦 Download ZIP Bundle ({len(downloaded)} parts)",
+                        data=bundle_file,
+                        file_name=f"voterlists_ward_{first_ward}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                        mime="application/zip",
+                        key="download-auto-bundle"
+                    )
+            
+            else:
+                # Merge PDFs
+                try:
+                    paths = [path for _, path in downloaded]
+                    merged_path = run_job(
+                        ('merge', tuple(paths)), merge_job, paths, spool_name("merged", paths),
+                        label=f"Merge {len(paths)} parts"
+                    )
                 
-                first_ward = df.iloc[0].get('Ward Name', df.iloc[0].get('Ward Code', 'unknown'))
+                    first_ward = df.iloc[0].get('Ward Name', df.iloc[0].get('Ward Code', 'unknown'))
                 
-                st.download_button(
-                    label=f"📥 Download Merged PDF ({len(pdf_buffers)} parts)",
-                    data=merged_output.getvalue(),
-                    file_name=f"merged_ward_{first_ward}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf",
-                    key="download-auto-merged"
-                )
+                    with open(merged_path, 'rb') as merged_file:
+                        st.download_button(
+                            label=f"📥 Download Merged PDF ({len(downloaded)} parts)",
+                            data=merged_file,
+                            file_name=f"merged_ward_{first_ward}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                            mime="application/pdf",
+                            key="download-auto-merged"
+                        )
                 
-                st.success(f"✅ Merged {len(pdf_buffers)} PDFs successfully!")
+                    st.success(f"✅ Merged {len(downloaded)} PDFs successfully!")
                 
-            except Exception as e:
-                st.error(f"Merge failed: {e}")
+                except Exception as e:
+                    st.error(f"Merge failed: {e}")
         else:
             st.error("❌ No PDFs could be downloaded.")
             st.info("💡 The website may require browser authentication. Try the manual method:")
@@ -579,6 +842,85 @@ if st.session_state['download_results']:
             st.markdown("2. Open it in your browser and click each link to download PDFs")
             st.markdown("3. Use the **Upload & Merge** section below to merge them")
 
+# --- Multi-Municipality Sweep ---
+st.markdown("---")
+st.subheader("🗺️ Multi-Municipality Sweep")
+st.markdown("Discover, download and extract every ward of several municipalities in one run. The largest municipalities and wards are scheduled first so no worker sits idle at the end.")
+
+sweep_munis = st.multiselect(
+    "Municipalities to sweep",
+    options=list(muni_options.keys()),
+    format_func=lambda x: muni_options.get(x, x),
+    key="sweep_munis"
+)
+
+if st.button("🗺️ Run Sweep", type="primary", key="sweep_btn"):
+    if not sweep_munis:
+        st.error("Please select municipalities to sweep.")
+    else:
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        
+        use_browser_auth = st.session_state.get('use_browser_auth', False)
+        municipalities = [(code, muni_options.get(code, code)) for code in sweep_munis]
+        sweep = run_job(
+            ('sweep', selected_election_code, selected_district_code, tuple(sweep_munis), use_browser_auth),
+            sweep_municipalities, get_session(), selected_election_code, selected_district_code, municipalities,
+            get_auth_provider() if use_browser_auth else None,
+            label=f"Sweep {len(municipalities)} municipalities",
+            progress_bar=progress_bar, status_text=status_text
+        )
+        
+        progress_bar.empty()
+        status_text.empty()
+        
+        if sweep['auth_note']:
+            st.warning(sweep['auth_note'])
+        
+        s1, s2, s3 = st.columns(3)
+        s1.metric("Makespan", f"{sweep['makespan']:.1f}s")
+        s2.metric("One Municipality per Worker (est.)", f"{sweep['naive_makespan']:.1f}s")
+        s3.metric("Voters Extracted", f"{len(sweep['voters']):,}")
+        
+        if sweep['rows']:
+            st.dataframe(pd.DataFrame(sweep['rows']).drop(columns=['Link'], errors='ignore'), use_container_width=True, hide_index=True)
+        
+        if sweep['failed']:
+            with st.expander(f"⚠️ {len(sweep['failed'])} problems"):
+                for fail in sweep['failed']:
+                    st.text(fail)
+        
+        if not sweep['summary'].empty:
+            st.dataframe(sweep['summary'], use_container_width=True, hide_index=True)
+        
+        col_s1, col_s2 = st.columns(2)
+        with col_s1:
+            if sweep['voters']:
+                from io import BytesIO
+                output = BytesIO()
+                with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                    if not sweep['summary'].empty:
+                        sweep['summary'].to_excel(writer, index=False, sheet_name='Summary')
+                    typed_voters(pd.DataFrame(sweep['voters'])).to_excel(writer, index=False, sheet_name='All Voters')
+                
+                st.download_button(
+                    label="📥 Download Sweep Excel",
+                    data=output.getvalue(),
+                    file_name=f"voter_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    key="download-sweep-excel"
+                )
+        with col_s2:
+            if sweep['bundle_path']:
+                with open(sweep['bundle_path'], 'rb') as bundle_file:
+                    st.download_button(
+                        label="📦 Download Sweep ZIP Bundle",
+                        data=bundle_file,
+                        file_name=f"voterlists_sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                        mime="application/zip",
+                        key="download-sweep-bundle"
+                    )
+
 # --- PDF to Excel Conversion & Merge Section ---
 st.markdown("---")
 st.header("📄 PDF Tools")
@@ -600,26 +942,20 @@ with tab_merge:
         
         if st.button("📎 Merge into Single PDF", type="primary", key="merge_btn"):
             try:
-                from PyPDF2 import PdfMerger
-                from io import BytesIO
-                
-                merger = PdfMerger()
-                for pdf in merge_files:
-                    pdf.seek(0)
-                    merger.append(pdf)
-                
-                output = BytesIO()
-                merger.write(output)
-                merger.close()
-                output.seek(0)
-                
-                st.download_button(
-                    label="📥 Download Merged PDF",
-                    data=output.getvalue(),
-                    file_name=f"merged_voterlist_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-                    mime="application/pdf",
-                    key="download-merged"
+                paths = [spool_upload(pdf) for pdf in merge_files]
+                merged_path = run_job(
+                    ('merge', tuple(paths)), merge_job, paths, spool_name("merged", paths),
+                    label=f"Merge {len(paths)} uploads"
                 )
+                
+                with open(merged_path, 'rb') as merged_file:
+                    st.download_button(
+                        label="📥 Download Merged PDF",
+                        data=merged_file,
+                        file_name=f"merged_voterlist_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
+                        mime="application/pdf",
+                        key="download-merged"
+                    )
                 st.success(f"✅ Merged {len(merge_files)} PDFs successfully!")
             except ImportError:
                 st.error("❌ PyPDF2 not installed. Run: `pip install PyPDF2`")
@@ -639,6 +975,15 @@ with tab_extract:
     if extract_files:
         st.info(f"📁 {len(extract_files)} file(s) selected")
         
+        extract_mode = st.radio(
+            "Extraction mode",
+            ["Grid cells (multi-column rolls)", "Text lines (legacy)"],
+            horizontal=True,
+            key="extract_mode",
+            help="Grid mode finds the voter card grid once per page template and parses each card on its own, so neighbouring cards never interleave."
+        )
+        extract_mode = "grid" if extract_mode.startswith("Grid") else "text"
+        
         if st.button("🔄 Convert PDFs to Excel", type="primary", key="extract_btn"):
             try:
                 import pdfplumber
@@ -646,83 +991,19 @@ with tab_extract:
                 st.error("❌ pdfplumber not installed. Run: `pip install pdfplumber`")
                 st.stop()
             
-            all_voters = []
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            for file_idx, uploaded_file in enumerate(extract_files):
-                status_text.text(f"Processing {uploaded_file.name} ({file_idx + 1}/{len(extract_files)})...")
-                
-                try:
-                    with pdfplumber.open(uploaded_file) as pdf:
-                        for page_num, page in enumerate(pdf.pages):
-                            text = page.extract_text()
-                            if not text:
-                                continue
-                            
-                            # Extract ward from filename
-                            ward_match = re.search(r'ward[-_]?(\d+)', uploaded_file.name, re.IGNORECASE)
-                            ward_from_filename = ward_match.group(1) if ward_match else 'Unknown'
-                            
-                            lines = text.split('\n')
-                            current_voter = {}
-                            
-                            for line in lines:
-                                line = line.strip()
-                                
-                                # Match AC No.-PS No.-SLNo pattern
-                                ac_match = re.search(r'A\.?C\.?\s*No\.?.*?PS\s*No\.?.*?SL\.?\s*No\.?.*?:\s*(\d+)\s*[-–]\s*(\d+)\s*[-–]\s*(\d+)', line, re.IGNORECASE)
-                                if ac_match:
-                                    if current_voter and current_voter.get('Name'):
-                                        all_voters.append(current_voter)
-                                    current_voter = {
-                                        'Source File': uploaded_file.name,
-                                        'Ward': ward_from_filename,
-                                        'AC No': ac_match.group(1),
-                                        'PS No': ac_match.group(2),
-                                        'SL No': ac_match.group(3)
-                                    }
-                                    continue
-                                
-                                # Match Name
-                                name_match = re.match(r'^Name\s*[:.]?\s*(.+)$', line, re.IGNORECASE)
-                                if name_match and current_voter:
-                                    current_voter['Name'] = name_match.group(1).strip()
-                                    continue
-                                
-                                # Match Father/Husband Name
-                                father_match = re.match(r'^(Father|Husband)\s*(Name)?\s*[:.]?\s*(.+)$', line, re.IGNORECASE)
-                                if father_match and current_voter:
-                                    current_voter['Father/Husband Name'] = father_match.group(3).strip()
-                                    continue
-                                
-                                # Match Age and Sex
-                                age_match = re.search(r'Age\s*[:.]?\s*(\d+)', line, re.IGNORECASE)
-                                sex_match = re.search(r'Sex\s*[:.]?\s*([MF])', line, re.IGNORECASE)
-                                if age_match and current_voter:
-                                    current_voter['Age'] = age_match.group(1)
-                                if sex_match and current_voter:
-                                    current_voter['Sex'] = sex_match.group(1)
-                                
-                                # Match Door No
-                                door_match = re.match(r'^Door\s*No\.?\s*[:.]?\s*(.+)$', line, re.IGNORECASE)
-                                if door_match and current_voter:
-                                    current_voter['Door No'] = door_match.group(1).strip()
-                                    continue
-                                
-                                # Match EPIC No
-                                epic_match = re.match(r'^EPIC\s*No\.?\s*[:.]?\s*([A-Z0-9]+)', line, re.IGNORECASE)
-                                if epic_match and current_voter:
-                                    current_voter['EPIC No'] = epic_match.group(1).strip()
-                                    continue
-                            
-                            if current_voter and current_voter.get('Name'):
-                                all_voters.append(current_voter)
-                                
-                except Exception as e:
-                    st.warning(f"⚠️ Error processing {uploaded_file.name}: {e}")
-                
-                progress_bar.progress((file_idx + 1) / len(extract_files))
+            # Spool once; parse workers only ever see (name, path, page range)
+            files = [(f.name, spool_upload(f)) for f in extract_files]
+            job_key = ('extract', tuple(files), extract_mode)
+            all_voters, extract_errors, df_summary = run_job(
+                job_key, extract_voters, files, extract_mode,
+                label=f"Extract {len(files)} PDFs",
+                progress_bar=progress_bar, status_text=status_text
+            )
+            for err in extract_errors:
+                st.warning(err)
             
             progress_bar.empty()
             status_text.empty()
@@ -733,7 +1014,7 @@ with tab_extract:
                 cols = ['Source File', 'Ward', 'AC No', 'PS No', 'SL No', 'Name', 
                        'Father/Husband Name', 'Age', 'Sex', 'Door No', 'EPIC No']
                 cols = [c for c in cols if c in df_voters.columns]
-                df_voters = df_voters[cols]
+                df_voters = typed_voters(df_voters[cols])
                 
                 st.success(f"✅ Extracted {len(df_voters)} voter records from {len(extract_files)} PDF(s)")
                 
@@ -745,13 +1026,27 @@ with tab_extract:
                 if len(df_voters) > 100:
                     st.caption(f"Showing first 100 of {len(df_voters)} records")
                 
+                # Ward / Municipality Summary
+                if not df_summary.empty:
+                    st.subheader("📈 Ward Summary")
+                    totals = df_summary.iloc[-1]
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Voters", f"{totals['Voters']:,}")
+                    m2.metric("Females per 1000 Males", "-" if pd.isna(totals['Females per 1000 Males']) else f"{totals['Females per 1000 Males']:.0f}")
+                    m3.metric("Mean Age", "-" if pd.isna(totals['Mean Age']) else f"{totals['Mean Age']:.1f}")
+                    m4.metric("Voters per Door", "-" if pd.isna(totals['Voters per Door']) else f"{totals['Voters per Door']:.2f}")
+                    
+                    st.dataframe(df_summary, use_container_width=True, hide_index=True)
+                    st.bar_chart(df_summary.iloc[:-1].set_index('Ward')[AGE_LABELS])
+                
                 # Excel with separate sheets per ward
                 from io import BytesIO
                 output = BytesIO()
                 with pd.ExcelWriter(output, engine='openpyxl') as writer:
+                    if not df_summary.empty:
+                        df_summary.to_excel(writer, index=False, sheet_name='Summary')
                     df_voters.to_excel(writer, index=False, sheet_name='All Voters')
-                    for ward in sorted(wards):
-                        ward_df = df_voters[df_voters['Ward'] == ward]
+                    for ward, ward_df in df_voters.groupby('Ward', observed=True):
                         sheet_name = f"Ward_{ward}"[:31]
                         ward_df.to_excel(writer, index=False, sheet_name=sheet_name)
                 
@@ -765,8 +1060,23 @@ with tab_extract:
             else:
                 st.warning("⚠️ No voter data could be extracted.")
 
+# Sidebar Shared Jobs
+active_jobs = get_job_service().active_jobs()
+if active_jobs:
+    st.sidebar.title("Shared Jobs")
+    for job in active_jobs:
+        progress, message = job.snapshot()
+        st.sidebar.text(f"{job.label or job.key[0]}: {progress:.0%} ({job.subscribers} watching)")
+
 # Sidebar Logging
 st.sidebar.title("Connection Logs")
+if 'session' in st.session_state:
+    stats = connection.transport_stats(st.session_state['session'])
+    if stats and stats['requests']:
+        st.sidebar.caption(
+            f"{stats['requests']} requests over {stats['connections']} connections "
+            f"({stats['reuse_ratio']:.0%} reused), {stats['bytes_on_wire'] / 1024:,.0f} KiB on the wire"
+        )
 if st.button("Clear Logs", key="clear_logs"):
     st.session_state['logs'] = []
 
@@ -0,0 +1,171 @@
+import threading
+
+
+class BrowserAuthError(Exception):
+    pass
+
+
+def chrome_driver_factory(headless=True):
+    """
+    Returns a callable that launches a Chrome webdriver. selenium and
+    webdriver-manager are imported lazily so the app runs without them.
+    """
+    def launch():
+        try:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.service import Service
+            from webdriver_manager.chrome import ChromeDriverManager
+        except ImportError as e:
+            raise BrowserAuthError(f"Browser authorization needs selenium and webdriver-manager: {e}")
+
+        options = webdriver.ChromeOptions()
+        if headless:
+            options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--disable-dev-shm-usage")
+        options.add_argument("--ignore-certificate-errors")
+        return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+    return launch
+
+
+def wait_for_staleness(driver, element, timeout):
+    """Blocks until `element` is detached from the DOM, i.e. the browser has left its page."""
+    from selenium.webdriver.support import expected_conditions
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    WebDriverWait(driver, timeout).until(expected_conditions.staleness_of(element))
+
+
+# Submits the authorization form from inside the browser so the server sees a
+# real page navigation (scripts, redirects and cookies all handled by Chrome).
+_SUBMIT_FORM_JS = """
+const [action, fields] = arguments;
+const form = document.createElement('form');
+form.method = 'POST';
+form.action = action;
+for (const [name, value] of Object.entries(fields)) {
+    const input = document.createElement('input');
+    input.type = 'hidden';
+    input.name = name;
+    input.value = value;
+    form.appendChild(input);
+}
+document.body.appendChild(form);
+form.submit();
+"""
+
+
+class BrowserAuthProvider:
+    """
+    Obtains authorized TSEC session cookies from a pooled headless browser and
+    injects them into plain requests sessions.
+
+    The browser is only used to authorize; PDFs are still fetched over the
+    fast HTTP path. Cookies are reused by every session until a download
+    comes back as something other than a PDF, at which point one caller
+    refreshes them and everyone else picks up the new set.
+
+    A failed harvest marks the provider `failed`: refresh() stops driving the
+    browser until the next authorize() (i.e. the next job) tries again.
+    """
+
+    def __init__(self, auth_url, driver_factory=None, page_timeout=60, wait_for_navigation=None):
+        self.auth_url = auth_url
+        self.page_timeout = page_timeout
+        self._driver_factory = driver_factory or chrome_driver_factory()
+        self._wait_for_navigation = wait_for_navigation or wait_for_staleness
+        self._driver = None
+        self._lock = threading.Lock()
+        self._cookies = None
+        self._user_agent = None
+        self.generation = 0
+        self.failed = None
+        self.stats = {"launches": 0, "harvests": 0, "injections": 0}
+
+    def _get_driver(self):
+        if self._driver is None:
+            self._driver = self._driver_factory()
+            self._driver.set_page_load_timeout(self.page_timeout)
+            self.stats["launches"] += 1
+        return self._driver
+
+    def _harvest(self, form_data):
+        try:
+            self._harvest_with_driver(self._get_driver(), form_data)
+        except Exception as e:
+            if not isinstance(e, BrowserAuthError):
+                # A crashed or wedged browser is dropped so the next harvest relaunches it
+                self._quit_driver()
+                e = BrowserAuthError(f"Browser authorization failed: {e}")
+            self.failed = e
+            raise e
+        self.failed = None
+
+    def _harvest_with_driver(self, driver, form_data):
+        driver.get(self.auth_url)
+        if form_data:
+            # document.readyState right after submit() still reports the old page;
+            # wait for the old <html> element to go stale instead
+            old_page = driver.find_element("tag name", "html")
+            driver.execute_script(_SUBMIT_FORM_JS, self.auth_url, {k: str(v) for k, v in form_data.items()})
+            self._wait_for_navigation(driver, old_page, self.page_timeout)
+
+        cookies = driver.get_cookies()
+        if not cookies:
+            raise BrowserAuthError("Browser returned no session cookies")
+        self._cookies = cookies
+        self._user_agent = driver.execute_script("return navigator.userAgent")
+        self.generation += 1
+        self.stats["harvests"] += 1
+
+    def _inject(self, session):
+        for cookie in self._cookies:
+            session.cookies.set(
+                cookie["name"], cookie["value"],
+                domain=cookie.get("domain"), path=cookie.get("path", "/")
+            )
+        # Cookies are often bound to the browser that obtained them
+        if self._user_agent:
+            session.headers["User-Agent"] = self._user_agent
+        session.auth_generation = self.generation
+        self.stats["injections"] += 1
+
+    def authorize(self, session, form_data=None):
+        """
+        Injects the current cookies into `session`, launching the browser only
+        if none exist yet or the last harvest failed.
+        """
+        with self._lock:
+            if self._cookies is None or self.failed:
+                self._harvest(form_data)
+            self._inject(session)
+        return self.generation
+
+    def refresh(self, session, form_data=None):
+        """
+        Called after a non-PDF response. If another caller already refreshed
+        since `session` was authorized, the newer cookies are reused instead of
+        driving the browser again. Raises the last error without touching the
+        browser once a harvest has failed.
+        """
+        with self._lock:
+            if self.failed:
+                raise self.failed
+            if getattr(session, "auth_generation", None) == self.generation:
+                self._harvest(form_data)
+            self._inject(session)
+        return self.generation
+
+    def _quit_driver(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            finally:
+                self._driver = None
+
+    def close(self):
+        with self._lock:
+            self._quit_driver()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import threading
+import zipfile
+
+
+def part_filename(ward_code, part_no):
+    return f"voterlist_ward{ward_code}_part{part_no}.pdf"
+
+
+def part_rows(df):
+    """
+    (ward_name, ward_code, part_no, url) for every report row that has a
+    download link. "No Data Found" rows have no Link (NaN) and are skipped.
+    """
+    if 'Link' not in df.columns:
+        return []
+    return [
+        (
+            row.get('Ward Name', row.get('Ward Code', 'Unknown')),
+            row.get('Ward Code', 'X'),
+            row.get('AC Part No', idx),
+            row['Link']
+        )
+        for idx, row in df.iterrows()
+        if isinstance(row['Link'], str) and row['Link']
+    ]
+
+
+class ZipBundle:
+    """
+    ZIP archive on disk that part PDFs are appended to as each download finishes.
+
+    PDFs are already compressed internally, so entries are STORED rather than
+    deflated: adding a part is a plain file copy and the archive is usable as
+    soon as it is closed, with no merge pass.
+
+    The archive is written under a unique temp name next to `path` and only
+    moved into place by close(), so concurrent jobs that resolve to the same
+    path never write into one file and readers never see a partial archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        fd, self._tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".zip.part")
+        self._file = os.fdopen(fd, "w+b")
+        self._zip = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_STORED, allowZip64=True)
+
+    def add(self, ward_code, part_no, src_path, folder=None):
+        """
+        Adds a spooled part PDF under ward{code}/voterlist_ward{code}_part{no}.pdf,
+        nested in `folder` when parts from several municipalities share one bundle.
+        """
+        arcname = f"ward{ward_code}/{part_filename(ward_code, part_no)}"
+        if folder:
+            arcname = f"{folder}/{arcname}"
+        with self._lock:
+            self._zip.write(src_path, arcname, compress_type=zipfile.ZIP_STORED)
+            self.count += 1
+        return arcname
+
+    def close(self):
+        """Finishes the archive and moves it to `path`."""
+        with self._lock:
+            if self._tmp_path is None:
+                return self.path
+            self._zip.close()
+            self._file.close()
+            os.replace(self._tmp_path, self.path)
+            self._tmp_path = None
+        return self.path
+
+    def discard(self):
+        """Drops an unfinished archive without touching `path`."""
+        with self._lock:
+            if self._tmp_path is None:
+                return
+            self._zip.close()
+            self._file.close()
+            os.remove(self._tmp_path)
+            self._tmp_path = None
+
+    @property
+    def size(self):
+        return os.path.getsize(self._tmp_path or self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
@@ -1,23 +1,137 @@
+import threading
+from urllib.parse import urlsplit, parse_qs
+
 import requests
 import urllib3
 from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 from urllib3.util.retry import Retry
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def get_session():
+# (connect, read) timeouts per TSEC `mode`, applied when a caller passes no timeout
+DEFAULT_TIMEOUT = (10, 30)
+ENDPOINT_TIMEOUTS = {
+    'getMunicipality': (10, 30),
+    'getWard': (10, 30),
+    'getPartNos': (10, 30),
+    'getWardWiseData': (10, 60),
+    'createViewInEnglishReport': (10, 60),  # PDF download
+}
+
+# Only what urllib3 can actually decode here: gzip/deflate always, br when
+# brotli/brotlicffi is installed, zstd when zstandard is installed.
+SUPPORTED_ENCODINGS = ACCEPT_ENCODING.replace(",", ", ")
+
+
+def _request_mode(request):
+    """The TSEC `mode` of a prepared request, from its query string or form body."""
+    mode = parse_qs(urlsplit(request.url).query).get('mode')
+    if not mode and request.body:
+        body = request.body.decode(errors='ignore') if isinstance(request.body, bytes) else str(request.body)
+        mode = parse_qs(body).get('mode')
+    return mode[0] if mode else None
+
+
+class _CountingReader:
+    """Proxy for a response's socket file that reports every byte read from it."""
+
+    def __init__(self, fp, count):
+        self._fp = fp
+        self._count = count
+
+    def _counted(self, data):
+        if data:
+            self._count(len(data))
+        return data
+
+    def read(self, *args):
+        return self._counted(self._fp.read(*args))
+
+    def read1(self, *args):
+        return self._counted(self._fp.read1(*args))
+
+    def readline(self, *args):
+        return self._counted(self._fp.readline(*args))
+
+    def readinto(self, buffer):
+        n = self._fp.readinto(buffer)
+        if n:
+            self._count(n)
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+
+class TransportAdapter(HTTPAdapter):
+    """
+    HTTPAdapter with per-endpoint default timeouts and connection-reuse /
+    bytes-on-wire counters.
+
+    bytes_on_wire counts the raw body bytes actually read off the socket
+    (still compressed, plus any chunk framing), so chunked and compressed
+    responses are counted correctly.
+    Streamed bodies (stream=True) are counted as they are read; a body that
+    is never read, or only partly read, is not (fully) counted.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_on_wire = 0
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            timeout = ENDPOINT_TIMEOUTS.get(_request_mode(request), DEFAULT_TIMEOUT)
+        response = super().send(request, timeout=timeout, **kwargs)
+        with self._stats_lock:
+            self.requests += 1
+        self._count_body(response.raw)
+        return response
+
+    def _count_body(self, raw):
+        """
+        Routes the response's socket file through a counter. Both requests'
+        non-streamed .content and iter_content() read through it, including
+        chunked bodies, which bypass urllib3's own tell() counter.
+        """
+        fp = getattr(getattr(raw, '_fp', None), 'fp', None)
+        if fp is not None:
+            raw._fp.fp = _CountingReader(fp, self._add_bytes)
+
+    def _add_bytes(self, n):
+        with self._stats_lock:
+            self.bytes_on_wire += n
+
+    def connection_stats(self):
+        """New connections (each one a DNS lookup + TCP/TLS handshake) vs requests sent."""
+        pools = [self.poolmanager.pools[key] for key in self.poolmanager.pools.keys()]
+        return {
+            'requests': self.requests,
+            'connections': sum(pool.num_connections for pool in pools),
+            'bytes_on_wire': self.bytes_on_wire,
+        }
+
+
+def get_session(pool_connections=4, pool_maxsize=10):
     """
     Returns a configured requests.Session object with retries.
+
+    pool_maxsize should match the number of threads sharing the session so
+    every worker keeps its own kept-alive connection (no repeated DNS lookups
+    or TLS handshakes); pool_connections is how many hosts keep a pool.
     """
     session = requests.Session()
-    
+
     # Headers from user browser (updated 2026-02-07)
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/144.0.0.0 Safari/537.36 Edg/144.0.0.0',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
         'Accept-Language': 'en-US,en;q=0.9,en-IN;q=0.8',
-        'Accept-Encoding': 'gzip, deflate, br, zstd',
+        'Accept-Encoding': SUPPORTED_ENCODINGS,
         'Connection': 'keep-alive',
         'Upgrade-Insecure-Requests': '1',
         # 'Cookie': 'JSESSIONID=...', # Removed hardcoded cookie to allow fresh session
@@ -31,10 +145,10 @@ def get_session():
         'Sec-Fetch-Site': 'same-origin',
         'Sec-Fetch-User': '?1'
     }
-    
+
     session.headers.update(headers)
     session.verify = False
-    
+
     # Add Retry Logic
     retry_strategy = Retry(
         total=5, # Increased retries
@@ -44,8 +158,23 @@ def get_session():
         status_forcelist=[429, 500, 502, 503, 504],
         allowed_methods=["HEAD", "GET", "POST", "OPTIONS"]
     )
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    # One adapter for both schemes so they share counters
+    adapter = TransportAdapter(
+        max_retries=retry_strategy,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize
+    )
     session.mount("https://", adapter)
     session.mount("http://", adapter)
-    
+
     return session
+
+
+def transport_stats(session):
+    """Connection-reuse and bytes-on-wire counters for a session from get_session()."""
+    adapter = session.get_adapter("https://")
+    if not isinstance(adapter, TransportAdapter):
+        return None
+    stats = adapter.connection_stats()
+    stats['reuse_ratio'] = 1 - stats['connections'] / stats['requests'] if stats['requests'] else 0.0
+    return stats
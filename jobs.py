@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """
+    A unit of background work shared by every session that requested it.
+    Sessions poll the job for progress instead of repeating the work.
+    """
+
+    def __init__(self, key, label=""):
+        self.key = key
+        self.label = label
+        self.status = "pending"
+        self.done = 0
+        self.total = 0
+        self.message = ""
+        self.subscribers = 1
+        self.created = time.time()
+        self.finished_at = None
+        self._result = None
+        self._error = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    def update(self, done=None, total=None, message=None):
+        """Called from the worker to report progress."""
+        with self._lock:
+            if done is not None:
+                self.done = done
+            if total is not None:
+                self.total = total
+            if message is not None:
+                self.message = message
+
+    def join(self):
+        """Registers one more session following this job."""
+        with self._lock:
+            self.subscribers += 1
+
+    def leave(self):
+        """Called when a session stops following this job."""
+        with self._lock:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def snapshot(self):
+        """Returns (progress 0..1, message) for rendering."""
+        with self._lock:
+            progress = (self.done / self.total) if self.total else 0.0
+            return min(progress, 1.0), self.message
+
+    @property
+    def finished(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks up to `timeout` seconds; returns True once the job has finished."""
+        return self._event.wait(timeout)
+
+    def result(self):
+        """Returns the job result, re-raising the worker's exception if it failed."""
+        self._event.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _finish(self, result=None, error=None):
+        with self._lock:
+            self._result = result
+            self._error = error
+            self.status = "failed" if error is not None else "done"
+            self.finished_at = time.time()
+        self._event.set()
+
+
+class JobService:
+    """
+    Process-wide background job runner.
+
+    Identical requests (same key) that are still in flight are coalesced onto
+    a single Job, so load grows with unique work rather than with the number
+    of connected users.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tsec-job")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {"submitted": 0, "coalesced": 0, "completed": 0, "failed": 0}
+
+    def submit(self, key, fn, *args, label="", **kwargs):
+        """
+        Runs fn(job, *args, **kwargs) on the worker pool, or joins the job
+        already running under the same key.
+        """
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and not job.finished:
+                job.join()
+                self.stats["coalesced"] += 1
+                return job
+
+            job = Job(key, label=label)
+            self._inflight[key] = job
+            self.stats["submitted"] += 1
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            job._finish(error=e)
+        else:
+            job._finish(result=result)
+        finally:
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+                self.stats["failed" if job.status == "failed" else "completed"] += 1
+
+    def active_jobs(self):
+        """Returns the jobs currently queued or running."""
+        with self._lock:
+            return list(self._inflight.values())
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,264 @@
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from spool import open_mapped
+
+# Pages per parse task. Small enough to spread one large roll across workers,
+# large enough that per-task overhead (open + xref parse) stays negligible.
+PAGES_PER_TASK = 8
+
+# First word of every voter card ("A.C No.-PS No.-SL No: ..."); its position marks the card's corner
+CARD_ANCHOR = re.compile(r'^A\.?C\.?(No\.?)?$|^A\.?C\.?No', re.IGNORECASE)
+# Points of slack when clustering anchor positions and grouping words into lines
+GRID_TOLERANCE = 3.0
+
+# Last card grid detected per page size, per worker process; reused only while every
+# card anchor on a page still lines up with it (see page_grid)
+_grid_cache = {}
+
+
+def ward_from_filename(name):
+    ward_match = re.search(r'ward[-_]?(\d+)', name, re.IGNORECASE)
+    return ward_match.group(1) if ward_match else 'Unknown'
+
+
+def parse_page_text(text, name, ward):
+    """Parses the voter records out of one page of extracted text."""
+    voters = []
+    current_voter = {}
+
+    for line in text.split('\n'):
+        line = line.strip()
+
+        # Match AC No.-PS No.-SLNo pattern
+        ac_match = re.search(r'A\.?C\.?\s*No\.?.*?PS\s*No\.?.*?SL\.?\s*No\.?.*?:\s*(\d+)\s*[-–]\s*(\d+)\s*[-–]\s*(\d+)', line, re.IGNORECASE)
+        if ac_match:
+            if current_voter and current_voter.get('Name'):
+                voters.append(current_voter)
+            current_voter = {
+                'Source File': name,
+                'Ward': ward,
+                'AC No': ac_match.group(1),
+                'PS No': ac_match.group(2),
+                'SL No': ac_match.group(3)
+            }
+            continue
+
+        # Match Name
+        name_match = re.match(r'^Name\s*[:.]?\s*(.+)$', line, re.IGNORECASE)
+        if name_match and current_voter:
+            current_voter['Name'] = name_match.group(1).strip()
+            continue
+
+        # Match Father/Husband Name
+        father_match = re.match(r'^(Father|Husband)\s*(Name)?\s*[:.]?\s*(.+)$', line, re.IGNORECASE)
+        if father_match and current_voter:
+            current_voter['Father/Husband Name'] = father_match.group(3).strip()
+            continue
+
+        # Match Age and Sex
+        age_match = re.search(r'Age\s*[:.]?\s*(\d+)', line, re.IGNORECASE)
+        sex_match = re.search(r'Sex\s*[:.]?\s*([MF])', line, re.IGNORECASE)
+        if age_match and current_voter:
+            current_voter['Age'] = int(age_match.group(1))
+        if sex_match and current_voter:
+            current_voter['Sex'] = sex_match.group(1).upper()
+
+        # Match Door No
+        door_match = re.match(r'^Door\s*No\.?\s*[:.]?\s*(.+)$', line, re.IGNORECASE)
+        if door_match and current_voter:
+            current_voter['Door No'] = door_match.group(1).strip()
+            continue
+
+        # Match EPIC No
+        epic_match = re.match(r'^EPIC\s*No\.?\s*[:.]?\s*([A-Z0-9]+)', line, re.IGNORECASE)
+        if epic_match and current_voter:
+            current_voter['EPIC No'] = epic_match.group(1).strip()
+            continue
+
+    if current_voter and current_voter.get('Name'):
+        voters.append(current_voter)
+
+    return voters
+
+
+def _cluster_starts(values, tolerance=GRID_TOLERANCE):
+    """Sorted start of each cluster of nearby coordinates."""
+    values = np.sort(values)
+    breaks = np.flatnonzero(np.diff(values) > tolerance) + 1
+    return values[np.r_[0, breaks]]
+
+
+def anchor_positions(words):
+    """(x0, top) arrays of the card-anchor words on a page."""
+    anchors = [w for w in words if CARD_ANCHOR.match(w['text'])]
+    return np.array([w['x0'] for w in anchors]), np.array([w['top'] for w in anchors])
+
+
+def detect_grid(x0, top):
+    """
+    Finds the card grid from card-anchor positions. Returns
+    (column_edges, row_edges) as the left/top edge of each cell, or None.
+    """
+    if not len(x0):
+        return None
+    return _cluster_starts(x0) - GRID_TOLERANCE, _cluster_starts(top) - GRID_TOLERANCE
+
+
+def _on_edges(values, edges):
+    """True if every value is within GRID_TOLERANCE of the cluster start behind one of `edges`."""
+    i = np.searchsorted(edges, values, side='right') - 1
+    return bool(np.all((i >= 0) & (values - edges[np.maximum(i, 0)] <= 2 * GRID_TOLERANCE)))
+
+
+def grid_fits(grid, x0, top):
+    """True if every card anchor starts on a column and a row of `grid`."""
+    column_edges, row_edges = grid
+    return _on_edges(x0, column_edges) and _on_edges(top, row_edges)
+
+
+def page_grid(page, words):
+    """
+    Grid for this page: the cached one for its page size when every anchor
+    lines up with it, otherwise re-detected, so a roll with a different
+    layout at the same page size never reuses a stale grid.
+    """
+    x0, top = anchor_positions(words)
+    if not len(x0):
+        return None
+    key = (round(page.width), round(page.height))
+    grid = _grid_cache.get(key)
+    if grid is None or not grid_fits(grid, x0, top):
+        grid = _grid_cache[key] = detect_grid(x0, top)
+    return grid
+
+
+def cell_texts(words, grid):
+    """
+    Buckets words into grid cells with vectorized coordinate binning and
+    returns each non-empty cell's text, lines in reading order. Words above
+    or left of the grid (page headers, margins) are dropped.
+    """
+    column_edges, row_edges = grid
+    x0 = np.array([w['x0'] for w in words])
+    top = np.array([w['top'] for w in words])
+
+    col = np.searchsorted(column_edges, x0, side='right') - 1
+    row = np.searchsorted(row_edges, top, side='right') - 1
+    inside = np.flatnonzero((col >= 0) & (row >= 0))
+    if not len(inside):
+        return []
+    cell = row[inside] * len(column_edges) + col[inside]
+
+    # Sort by cell then vertical position; a new line starts at a cell change or a vertical jump
+    order = np.lexsort((top[inside], cell))
+    cell, idx = cell[order], inside[order]
+    gaps = np.diff(top[idx]) > GRID_TOLERANCE
+    new_line = np.r_[True, (np.diff(cell) != 0) | gaps]
+    line = np.cumsum(new_line)
+
+    # Within each line, left to right
+    order = np.lexsort((x0[idx], line))
+    cell, idx, line = cell[order], idx[order], line[order]
+
+    texts = []
+    line_starts = np.flatnonzero(np.r_[True, np.diff(line) != 0])
+    line_ends = np.r_[line_starts[1:], len(idx)]
+    current_cell, lines = None, []
+    for start, end in zip(line_starts, line_ends):
+        if cell[start] != current_cell:
+            if lines:
+                texts.append('\n'.join(lines))
+            current_cell, lines = cell[start], []
+        lines.append(' '.join(words[i]['text'] for i in idx[start:end]))
+    if lines:
+        texts.append('\n'.join(lines))
+    return texts
+
+
+def parse_page_grid(page, name, ward):
+    """
+    Parses one page cell by cell. Returns None when no card grid is found so
+    the caller can fall back to the text parser.
+    """
+    words = page.extract_words(keep_blank_chars=False, use_text_flow=False)
+    if not words:
+        return []
+    grid = page_grid(page, words)
+    if grid is None:
+        return None
+    voters = []
+    for text in cell_texts(words, grid):
+        voters.extend(parse_page_text(text, name, ward))
+    return voters
+
+
+def count_pages(path):
+    from PyPDF2 import PdfReader
+
+    with open_mapped(path) as mapped:
+        return len(PdfReader(mapped).pages)
+
+
+def page_tasks(name, path, pages_per_task=PAGES_PER_TASK):
+    """Splits one spooled PDF into (name, path, start, stop) parse tasks."""
+    total = count_pages(path)
+    return [
+        (name, path, start, min(start + pages_per_task, total))
+        for start in range(0, total, pages_per_task)
+    ]
+
+
+def parse_pages(name, path, start, stop, mode="grid"):
+    """
+    Parse worker: memory-maps a spooled PDF and extracts voters from pages
+    [start, stop). Only the path and page range cross the process boundary.
+    Returns (voters, error).
+    """
+    import pdfplumber
+
+    voters = []
+    ward = ward_from_filename(name)
+    try:
+        with open_mapped(path) as mapped, pdfplumber.open(mapped) as pdf:
+            for page in pdf.pages[start:stop]:
+                if mode == "grid":
+                    page_voters = parse_page_grid(page, name, ward)
+                    if page_voters is not None:
+                        voters.extend(page_voters)
+                        continue
+                text = page.extract_text()
+                if not text:
+                    continue
+                voters.extend(parse_page_text(text, name, ward))
+    except Exception as e:
+        return voters, f"⚠️ Error processing {name}: {e}"
+    return voters, None
+
+
+def merge_pdfs(paths, out_path):
+    """
+    Merge worker: appends memory-mapped spool files into `out_path`. The merge
+    is written to a temp file and moved into place, so a session reading an
+    earlier merge of the same inputs never sees a truncated file.
+    """
+    from PyPDF2 import PdfMerger
+    from contextlib import ExitStack
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(out_path) or ".", suffix=".pdf.part")
+    try:
+        with ExitStack() as stack:
+            merger = PdfMerger()
+            for path in paths:
+                merger.append(stack.enter_context(open_mapped(path)))
+            with os.fdopen(fd, 'wb') as f:
+                merger.write(f)
+            merger.close()
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return out_path
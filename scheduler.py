@@ -0,0 +1,253 @@
+import bisect
+import heapq
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Fallbacks used until the timing history has seen real work
+DEFAULT_PER_PART = {"download": 2.0, "parse": 1.5}
+DEFAULT_PARTS_PER_WARD = 3
+HISTORY_ALPHA = 0.3
+
+
+class TimingHistory:
+    """
+    Per-stage seconds-per-part and discovered part/ward counts from earlier
+    sweeps, persisted as JSON so later sweeps can estimate work up front.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.data = {"per_part": {}, "ward_parts": {}, "muni_wards": {}}
+        try:
+            with open(path) as f:
+                self.data.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def per_part(self, stage):
+        return self.data["per_part"].get(stage, DEFAULT_PER_PART.get(stage, 1.0))
+
+    def record(self, stage, seconds, parts):
+        """Folds one observed task duration into the stage's moving average."""
+        if parts <= 0:
+            return
+        with self._lock:
+            observed = seconds / parts
+            previous = self.data["per_part"].get(stage)
+            self.data["per_part"][stage] = observed if previous is None else \
+                previous + HISTORY_ALPHA * (observed - previous)
+
+    def set_ward_parts(self, muni, ward, parts):
+        with self._lock:
+            self.data["ward_parts"][f"{muni}/{ward}"] = parts
+
+    def ward_parts(self, muni, ward):
+        return self.data["ward_parts"].get(f"{muni}/{ward}", DEFAULT_PARTS_PER_WARD)
+
+    def set_muni_wards(self, muni, wards):
+        with self._lock:
+            self.data["muni_wards"][str(muni)] = list(wards)
+
+    def muni_parts(self, muni):
+        """Estimated total parts in a municipality, from its last known ward list."""
+        wards = self.data["muni_wards"].get(str(muni))
+        if not wards:
+            return None
+        return sum(self.ward_parts(muni, ward) for ward in wards)
+
+    def save(self):
+        """Atomically rewrites the history file; concurrent sweeps each write their own temp file."""
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self.data, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+
+class Task:
+    __slots__ = ("pool", "key", "cost", "rank", "fn", "args", "parts", "stage")
+
+    def __init__(self, pool, key, cost, rank, fn, args, parts=0, stage=None):
+        self.pool = pool
+        self.key = key
+        self.cost = cost
+        self.rank = rank
+        self.fn = fn
+        self.args = args
+        self.parts = parts
+        self.stage = stage or pool
+
+    def sort_key(self):
+        # Lower rank first (discovery unblocks everything), then largest cost first
+        return (self.rank, -self.cost)
+
+
+class WorkStealingScheduler:
+    """
+    Runs tasks on named worker pools, largest estimated cost first.
+
+    Every worker owns a queue kept in (rank, -cost) order. New tasks go to the
+    least-loaded worker of their pool; a worker with an empty queue steals the
+    front (largest) task from the most-loaded worker in its own pool, then
+    from any pool listed in its `steal_from`. Tasks may submit follow-up tasks
+    (discovery -> download -> parse), so stages overlap instead of running as
+    separate passes.
+    """
+
+    def __init__(self, pools, history=None):
+        """`pools` maps name -> (n_workers, steal_from) where steal_from is a tuple of pool names."""
+        self.history = history
+        self._cond = threading.Condition()
+        self._pending = 0
+        self._pools = {}
+        for name, (n_workers, steal_from) in pools.items():
+            self._pools[name] = {
+                "queues": [[] for _ in range(max(1, n_workers))],
+                "loads": [0.0] * max(1, n_workers),
+                "steal_from": tuple(steal_from),
+            }
+        self.results = {}
+        self.errors = {}
+        self.durations = {}
+        self.steals = 0
+        self.makespan = None
+
+    def submit(self, pool, key, cost, fn, *args, rank=1, parts=0, stage=None):
+        task = Task(pool, key, cost, rank, fn, args, parts, stage)
+        with self._cond:
+            state = self._pools[pool]
+            worker = min(range(len(state["loads"])), key=state["loads"].__getitem__)
+            queue = state["queues"][worker]
+            keys = [t.sort_key() for t in queue]
+            queue.insert(bisect.bisect_right(keys, task.sort_key()), task)
+            state["loads"][worker] += cost
+            self._pending += 1
+            self._cond.notify_all()
+
+    def _pop(self, pool, worker):
+        state = self._pools[pool]
+        task = state["queues"][worker].pop(0)
+        state["loads"][worker] -= task.cost
+        return task
+
+    def _next(self, pool, worker):
+        """Own queue first, then steal from the busiest worker in this pool, then from other pools."""
+        state = self._pools[pool]
+        if state["queues"][worker]:
+            return self._pop(pool, worker)
+
+        for victim_pool in (pool,) + state["steal_from"]:
+            victim_state = self._pools[victim_pool]
+            victims = [i for i, q in enumerate(victim_state["queues"]) if q]
+            if victims:
+                victim = max(victims, key=victim_state["loads"].__getitem__)
+                self.steals += 1
+                return self._pop(victim_pool, victim)
+        return None
+
+    def _worker(self, pool, worker):
+        while True:
+            with self._cond:
+                task = self._next(pool, worker)
+                while task is None:
+                    if self._pending == 0:
+                        return
+                    self._cond.wait(0.1)
+                    task = self._next(pool, worker)
+
+            started = time.perf_counter()
+            try:
+                self.results[task.key] = task.fn(*task.args)
+            except Exception as e:
+                self.errors[task.key] = e
+            elapsed = time.perf_counter() - started
+            self.durations[task.key] = (task.stage, elapsed)
+            if self.history is not None and task.parts:
+                self.history.record(task.stage, elapsed, task.parts)
+
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+
+    def run(self):
+        """Blocks until every submitted task (and any task they submitted) has finished."""
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(name, i), daemon=True, name=f"sched-{name}-{i}")
+            for name, state in self._pools.items()
+            for i in range(len(state["queues"]))
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.makespan = time.perf_counter() - started
+        return self.results
+
+
+def list_schedule(costs, workers):
+    """Makespan of greedy list scheduling of `costs`, in the given order, on identical workers."""
+    finish = [0.0] * max(1, workers)
+    heapq.heapify(finish)
+    for cost in costs:
+        heapq.heappush(finish, heapq.heappop(finish) + cost)
+    return max(finish)
+
+
+def naive_makespan(municipalities, workers):
+    """
+    Makespan of today's order: each worker takes the next whole municipality
+    in dict order. `municipalities` is a list of per-ward cost lists.
+    """
+    return list_schedule([sum(wards) for wards in municipalities], workers)
+
+
+def lpt_makespan(municipalities, workers):
+    """Makespan when all wards of all municipalities are dispatched largest-first."""
+    costs = sorted((c for wards in municipalities for c in wards), reverse=True)
+    return list_schedule(costs, workers)
+
+
+def synthetic_workload(seed=0):
+    """A district-like mix: several small municipalities and one large corporation listed last."""
+    rng = random.Random(seed)
+    ward_counts = [rng.randint(12, 36) for _ in range(6)] + [150]
+    return [
+        [rng.randint(1, 8) * DEFAULT_PER_PART["download"] for _ in range(n)]
+        for n in ward_counts
+    ]
+
+
+def measured_makespan(municipalities, workers, time_scale):
+    """
+    Runs one sleep task per ward through WorkStealingScheduler, submitted in
+    dict order, and returns the wall-clock makespan in workload seconds.
+    """
+    sched = WorkStealingScheduler({"download": (workers, ())})
+    for m, wards in enumerate(municipalities):
+        for w, cost in enumerate(wards):
+            sched.submit("download", (m, w), cost, time.sleep, cost * time_scale)
+    sched.run()
+    return sched.makespan / time_scale
+
+
+if __name__ == "__main__":
+    # One workload second is slept as 1 ms, so a full run takes a few seconds
+    TIME_SCALE = 0.001
+    workloads = [synthetic_workload(seed) for seed in range(5)]
+    for workers in (4, 8, 16):
+        naive = sum(naive_makespan(w, workers) for w in workloads) / len(workloads)
+        lpt = sum(lpt_makespan(w, workers) for w in workloads) / len(workloads)
+        measured = sum(measured_makespan(w, workers, TIME_SCALE) for w in workloads) / len(workloads)
+        bound = sum(sum(sum(m) for m in w) / workers for w in workloads) / len(workloads)
+        print(f"{workers:>2} workers: naive {naive:8.1f}s  largest-first {lpt:8.1f}s  "
+              f"scheduler {measured:8.1f}s  lower bound {bound:8.1f}s  speedup {naive / measured:.2f}x")
@@ -0,0 +1,135 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Working directory for uploaded and downloaded PDFs. Files are named by content
+# hash so the same PDF is only ever written (and held) once per box.
+SPOOL_DIR = os.environ.get("TSEC_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "tsec_spool"))
+
+# prune_spool() is called at the start of every job; this bounds how often it scans the disk
+PRUNE_INTERVAL = 600
+_last_prune = 0.0
+
+
+def spool_dir(*parts):
+    path = os.path.join(SPOOL_DIR, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _reuse(path):
+    """Touches an existing spool file so prune_spool() keeps it; False if it is gone."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _commit(tmp_path, digest, name):
+    """Moves a finished temp file into place under its content hash."""
+    suffix = os.path.splitext(name)[1] or ".pdf"
+    final_path = os.path.join(spool_dir("files"), f"{digest}{suffix}")
+    if _reuse(final_path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, final_path)
+    return final_path
+
+
+def spool_bytes(name, data):
+    """
+    Writes `data` (bytes, bytearray or memoryview) to the spool and returns its path.
+    Accepts a memoryview so Streamlit uploads can be spooled via getbuffer() without a copy.
+    """
+    digest = hashlib.sha1(data).hexdigest()
+    suffix = os.path.splitext(name)[1] or ".pdf"
+    final_path = os.path.join(spool_dir("files"), f"{digest}{suffix}")
+    if _reuse(final_path):
+        return final_path
+
+    fd, tmp_path = tempfile.mkstemp(dir=spool_dir("tmp"))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return _commit(tmp_path, digest, name)
+
+
+def spool_upload(uploaded_file):
+    """Spools a Streamlit UploadedFile and returns its path."""
+    return spool_bytes(uploaded_file.name, uploaded_file.getbuffer())
+
+
+def spool_response(name, response, chunk_size=64 * 1024):
+    """
+    Streams a requests response body straight to the spool and returns its path.
+    The response should be opened with stream=True so the body is never held in memory.
+    """
+    sha = hashlib.sha1()
+    fd, tmp_path = tempfile.mkstemp(dir=spool_dir("tmp"))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    sha.update(chunk)
+                    f.write(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    return _commit(tmp_path, sha.hexdigest(), name)
+
+
+def output_path(filename):
+    """Returns a path in the spool for a generated output file."""
+    return os.path.join(spool_dir("out"), filename)
+
+
+def state_path(filename):
+    """Returns a path for long-lived state (e.g. timing history) that prune_spool() never deletes."""
+    return os.path.join(spool_dir("state"), filename)
+
+
+def spool_name(prefix, paths, suffix=".pdf"):
+    """Deterministic output filename for a set of spooled inputs."""
+    digest = hashlib.sha1("\n".join(paths).encode()).hexdigest()[:16]
+    return f"{prefix}_{digest}{suffix}"
+
+
+@contextmanager
+def open_mapped(path):
+    """
+    Opens a spooled file as a read-only memory map. The map supports
+    read/seek/tell, so pdfplumber and PyPDF2 can read it directly while
+    every worker process shares the same page-cache pages.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+
+def prune_spool(max_age_hours=24, force=False):
+    """
+    Deletes spooled files not written or reused in the last `max_age_hours`.
+    Runs at most once per PRUNE_INTERVAL seconds unless `force` is set.
+    """
+    global _last_prune
+    now = time.time()
+    if not force and now - _last_prune < PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    cutoff = now - max_age_hours * 3600
+    for sub in ("files", "out", "tmp"):
+        folder = os.path.join(SPOOL_DIR, sub)
+        if not os.path.isdir(folder):
+            continue
+        for entry in os.scandir(folder):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+# Age bands used on the summary sheet: [18, 26) -> "18-25", ... , [46, 60) -> "46-59", [60, inf) -> "60+"
+AGE_EDGES = np.array([18, 26, 36, 46, 60])
+AGE_LABELS = ["18-25", "26-35", "36-45", "46-59", "60+"]
+
+
+def typed_voters(df):
+    """Returns df with integer Age and categorical Ward/Sex so groupbys stay vectorized."""
+    df = df.copy()
+    if 'Age' in df.columns:
+        df['Age'] = pd.to_numeric(df['Age'], errors='coerce').astype('Int16')
+    if 'Sex' in df.columns:
+        df['Sex'] = df['Sex'].str.upper().astype('category')
+    if 'Ward' in df.columns:
+        df['Ward'] = df['Ward'].astype(str).astype('category')
+    return df
+
+
+def _column(df, name):
+    if name in df.columns:
+        return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype=object)
+
+
+def batch_counts(df):
+    """Additive per-ward counts for one batch of records."""
+    codes, wards = pd.factorize(_column(df, 'Ward').astype(str), sort=False)
+    sex_codes, sexes = pd.factorize(_column(df, 'Sex'))
+    sexes = np.char.upper(np.asarray(sexes, dtype=str))
+    age = pd.to_numeric(_column(df, 'Age'), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+    has_age = ~np.isnan(age)
+    # Band index per row; -1 for missing or under-18 ages
+    band = np.where(has_age, np.searchsorted(AGE_EDGES, np.nan_to_num(age), side='right') - 1, -1)
+
+    def per_ward(weights=None):
+        return np.bincount(codes, weights=weights, minlength=len(wards))
+
+    counts = {
+        'Voters': per_ward(),
+        'Male': per_ward(np.isin(sex_codes, np.flatnonzero(sexes == 'M'))),
+        'Female': per_ward(np.isin(sex_codes, np.flatnonzero(sexes == 'F'))),
+        'Age Sum': per_ward(np.where(has_age, age, 0.0)),
+        'Age Count': per_ward(has_age),
+    }
+    for i, label in enumerate(AGE_LABELS):
+        counts[label] = per_ward(band == i)
+
+    return pd.DataFrame(counts, index=pd.Index(wards, name='Ward'))
+
+
+def batch_doors(df):
+    """(Ward, Door No) keys for one batch; counted once in door_stats()."""
+    if 'Door No' not in df.columns:
+        return df.iloc[:0][['Ward']].assign(**{'Door No': ''})
+    return df[['Ward', 'Door No']].dropna().astype(str)
+
+
+def door_stats(doors):
+    """Per-ward door count and largest household size, via integer key counting."""
+    ward_codes, wards = pd.factorize(doors['Ward'])
+    door_codes, door_nos = pd.factorize(doors['Door No'])
+    keys, voters_at_door = np.unique(ward_codes.astype(np.int64) * max(len(door_nos), 1) + door_codes, return_counts=True)
+    key_wards = keys // max(len(door_nos), 1)
+
+    largest = np.zeros(len(wards), dtype=np.int64)
+    np.maximum.at(largest, key_wards, voters_at_door)
+    stats = pd.DataFrame(
+        {'Doors': np.bincount(key_wards, minlength=len(wards)), 'Max Voters at a Door': largest},
+        index=pd.Index(wards, name='Ward')
+    )
+    stats.loc['All Wards'] = [len(keys), voters_at_door.max() if len(keys) else 0]
+    return stats
+
+
+class SummaryAccumulator:
+    """
+    Builds per-ward demographic summaries incrementally as record batches
+    arrive from the parse workers, so the summary is ready as soon as
+    extraction finishes.
+    """
+
+    def __init__(self):
+        self._counts = None
+        self._doors = []
+
+    def add(self, records):
+        """Adds a batch given as a list of record dicts or a DataFrame."""
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(records)
+        if df.empty:
+            return
+        counts = batch_counts(df)
+        self._counts = counts if self._counts is None else self._counts.add(counts, fill_value=0)
+        doors = batch_doors(df)
+        if len(doors):
+            self._doors.append(doors)
+
+    def result(self):
+        return build_summary(self._counts, self._doors)
+
+
+def build_summary(counts, door_batches=()):
+    """
+    Turns accumulated counts into the summary table: one row per ward plus a
+    municipality-wide 'All Wards' row.
+    """
+    if counts is None or counts.empty:
+        return pd.DataFrame()
+
+    counts = counts.sort_index(key=lambda idx: pd.to_numeric(idx, errors='coerce'))
+    counts.loc['All Wards'] = counts.sum()
+
+    if door_batches:
+        doors = door_stats(pd.concat(door_batches, ignore_index=True))
+    else:
+        doors = pd.DataFrame(columns=['Doors', 'Max Voters at a Door'])
+
+    summary = counts.join(doors, how='left')
+    summary['Doors'] = summary['Doors'].fillna(0)
+    summary['Max Voters at a Door'] = summary['Max Voters at a Door'].fillna(0)
+
+    male = summary['Male'].to_numpy(dtype=float)
+    female = summary['Female'].to_numpy(dtype=float)
+    age_count = summary['Age Count'].to_numpy(dtype=float)
+    door_count = summary['Doors'].to_numpy(dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        summary['Females per 1000 Males'] = np.where(male > 0, np.round(female * 1000 / male), np.nan)
+        summary['Mean Age'] = np.where(age_count > 0, np.round(summary['Age Sum'].to_numpy(dtype=float) / age_count, 1), np.nan)
+        summary['Voters per Door'] = np.where(door_count > 0, np.round(summary['Voters'].to_numpy(dtype=float) / door_count, 2), np.nan)
+
+    int_cols = ['Voters', 'Male', 'Female', 'Doors', 'Max Voters at a Door'] + AGE_LABELS
+    summary[int_cols] = summary[int_cols].astype(np.int64)
+
+    columns = ['Voters', 'Male', 'Female', 'Females per 1000 Males', 'Mean Age'] + AGE_LABELS + \
+              ['Doors', 'Voters per Door', 'Max Voters at a Door']
+    return summary[columns].reset_index().rename(columns={'index': 'Ward'})
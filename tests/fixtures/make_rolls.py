@@ -0,0 +1,58 @@
+"""
+Regenerates the synthetic voter-roll fixtures used by test_pdf_tools.py:
+
+    python tests/fixtures/make_rolls.py
+
+Each card mirrors the TSEC layout (anchor line first, then name, relation,
+age/sex, door and EPIC lines) with a border, laid out in a grid per page.
+Needs reportlab, which the app itself does not.
+"""
+import os
+import random
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+FIXTURES = os.path.dirname(os.path.abspath(__file__))
+
+# filename -> (ward, pages, columns, rows, left margin, row pitch)
+ROLLS = {
+    "voterlist_ward7_part1.pdf": (7, 2, 3, 10, 30, 78),
+    "voterlist_ward8_part1.pdf": (8, 1, 2, 12, 45, 64),
+}
+
+
+def make_roll(path, ward, pages, columns, rows, margin, pitch, seed=0):
+    rng = random.Random(seed)
+    width, height = A4
+    card_width = (width - 2 * margin) / columns
+    pdf = canvas.Canvas(path, pagesize=A4, invariant=1)
+    sl = 0
+    for page in range(pages):
+        pdf.setFont("Helvetica", 7)
+        pdf.drawString(margin, height - 25, f"Electoral Roll Ward {ward} Page {page + 1}")
+        for row in range(rows):
+            for col in range(columns):
+                sl += 1
+                x = margin + col * card_width
+                y = height - 50 - row * pitch
+                lines = [
+                    f"A.C No.-PS No.-SL No: 12-{ward}-{sl}",
+                    f"Name: VOTER{sl} KUMAR",
+                    f"Father Name: FATHER{sl} RAO",
+                    f"Age: {rng.randint(18, 90)} Sex: {rng.choice('MF')}",
+                    f"Door No: 1-{rng.randint(1, 99)}",
+                    f"EPIC No: TSX{ward}{sl:06d}",
+                ]
+                for i, line in enumerate(lines):
+                    pdf.drawString(x + 3, y - i * 9, line)
+                pdf.rect(x, y - 50, card_width - 4, 59)
+        pdf.showPage()
+    pdf.save()
+    return sl
+
+
+if __name__ == "__main__":
+    for filename, layout in ROLLS.items():
+        count = make_roll(os.path.join(FIXTURES, filename), *layout)
+        print(f"{filename}: {count} voters")
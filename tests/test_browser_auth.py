@@ -0,0 +1,194 @@
+import itertools
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from browser_auth import BrowserAuthError, BrowserAuthProvider
+
+PDF = b"%PDF-1.4\n%%EOF\n"
+
+
+class MockTSEC(BaseHTTPRequestHandler):
+    """Hands out an anonymous cookie on GET /auth and an authorized one on POST /auth."""
+
+    tokens = itertools.count(1)
+    valid = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _cookie(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "JSESSIONID":
+                return value
+        return None
+
+    def _send(self, body, content_type, cookie=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if cookie:
+            self.send_header("Set-Cookie", f"JSESSIONID={cookie}; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/auth"):
+            self._send(b"<html><form></form></html>", "text/html", cookie="anonymous")
+        elif self._cookie() in self.valid:
+            self._send(PDF, "application/pdf")
+        else:
+            self._send(b"<html>Session expired</html>", "text/html")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        token = f"auth{next(self.tokens)}"
+        self.valid.add(token)
+        self._send(b"<html>Authorized</html>", "text/html", cookie=token)
+
+
+class FakeElement:
+    def __init__(self, driver):
+        self._driver = driver
+        self._page = driver.page
+
+    @property
+    def stale(self):
+        return self._driver.page != self._page
+
+
+class FakeDriver:
+    """
+    Just enough of a selenium webdriver over requests. Form submission
+    navigates asynchronously, like a real browser, so cookies read straight
+    after execute_script() still belong to the old page.
+    """
+
+    def __init__(self, nav_delay=0.2):
+        self.nav_delay = nav_delay
+        self.session = requests.Session()
+        self.page = 0
+        self.quit_called = False
+
+    def set_page_load_timeout(self, timeout):
+        pass
+
+    def get(self, url):
+        self.session.get(url)
+        self.page += 1
+
+    def find_element(self, by, value):
+        assert (by, value) == ("tag name", "html")
+        return FakeElement(self)
+
+    def execute_script(self, script, *args):
+        if script == "return navigator.userAgent":
+            return "FakeBrowser/1.0"
+
+        action, fields = args
+
+        def navigate():
+            time.sleep(self.nav_delay)
+            self.session.post(action, data=fields)
+            self.page += 1
+
+        threading.Thread(target=navigate, daemon=True).start()
+
+    def get_cookies(self):
+        return [
+            {"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+            for c in self.session.cookies
+        ]
+
+    def quit(self):
+        self.quit_called = True
+
+
+def wait_for_fake_staleness(driver, element, timeout):
+    deadline = time.time() + timeout
+    while not element.stale:
+        if time.time() > deadline:
+            raise TimeoutError("page did not navigate")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockTSEC)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    MockTSEC.valid.clear()
+
+
+def make_provider(server, driver_factory=FakeDriver, **kwargs):
+    return BrowserAuthProvider(
+        f"{server}/auth", driver_factory=driver_factory,
+        wait_for_navigation=wait_for_fake_staleness, **kwargs
+    )
+
+
+def test_harvest_waits_for_form_navigation(server):
+    provider = make_provider(server)
+    session = requests.Session()
+    provider.authorize(session, {"mode": "getWardWiseData"})
+
+    response = session.get(f"{server}/pdf")
+    assert response.headers["Content-Type"] == "application/pdf"
+    assert session.headers["User-Agent"] == "FakeBrowser/1.0"
+    assert provider.stats["launches"] == 1
+
+
+def test_sessions_share_cookies_and_refresh_once(server):
+    provider = make_provider(server)
+    form_data = {"mode": "getWardWiseData"}
+    sessions = [requests.Session() for _ in range(3)]
+    for session in sessions:
+        provider.authorize(session, form_data)
+    assert provider.stats["harvests"] == 1
+
+    MockTSEC.valid.clear()
+    for session in sessions:
+        assert session.get(f"{server}/pdf").headers["Content-Type"] == "text/html"
+        provider.refresh(session, form_data)
+        assert session.get(f"{server}/pdf").headers["Content-Type"] == "application/pdf"
+    assert provider.stats["harvests"] == 2
+    assert provider.stats["launches"] == 1
+
+
+def test_failed_harvest_stops_refreshing(server):
+    class BrokenDriver(FakeDriver):
+        def get(self, url):
+            raise ConnectionError("browser crashed")
+
+    launches = []
+
+    def factory():
+        launches.append(1)
+        return FakeDriver() if len(launches) > 2 else BrokenDriver()
+
+    provider = make_provider(server, driver_factory=factory)
+    session = requests.Session()
+    session.auth_generation = provider.generation
+    with pytest.raises(BrowserAuthError):
+        provider.refresh(session, {"mode": "getWardWiseData"})
+    assert provider.failed
+
+    # Further refreshes fail fast without relaunching the browser
+    for _ in range(5):
+        with pytest.raises(BrowserAuthError):
+            provider.refresh(session, {"mode": "getWardWiseData"})
+    assert len(launches) == 1
+
+    # The next job's authorize() tries again
+    with pytest.raises(BrowserAuthError):
+        provider.authorize(session, {"mode": "getWardWiseData"})
+    provider.authorize(session, {"mode": "getWardWiseData"})
+    assert provider.failed is None
+    assert session.get(f"{server}/pdf").headers["Content-Type"] == "application/pdf"
@@ -0,0 +1,38 @@
+import zipfile
+
+import pandas as pd
+
+from bundle import ZipBundle, part_rows
+from spool import spool_name
+
+
+def report_frame():
+    """Report rows as built by the ward loop: one ward with parts, one without."""
+    return pd.DataFrame([
+        {"Ward Name": "1", "Ward Code": "1", "AC Part No": "1", "Status": "Available", "Link": "https://x/1/1"},
+        {"Ward Name": "2", "Ward Code": "2", "AC Part No": "N/A", "Status": "No Data Found", "Filename": "-"},
+        {"Ward Name": "1", "Ward Code": "1", "AC Part No": "2", "Status": "Available", "Link": "https://x/1/2"},
+    ])
+
+
+def test_part_rows_skips_rows_without_link():
+    rows = part_rows(report_frame())
+    assert rows == [("1", "1", "1", "https://x/1/1"), ("1", "1", "2", "https://x/1/2")]
+    # The bundle name and job key are built from these links
+    assert spool_name("bundle", [link for *_, link in rows], suffix=".zip").endswith(".zip")
+
+
+def test_part_rows_without_any_links():
+    assert part_rows(report_frame().drop(columns=["Link"])) == []
+    assert part_rows(report_frame().iloc[[1]]) == []
+
+
+def test_bundle_moves_into_place_on_close(tmp_path):
+    src = tmp_path / "part.pdf"
+    src.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    path = tmp_path / "bundle.zip"
+    with ZipBundle(str(path)) as bundle:
+        bundle.add("7", "1", str(src))
+        assert not path.exists()
+    assert zipfile.ZipFile(path).namelist() == ["ward7/voterlist_ward7_part1.pdf"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bundle.zip", "part.pdf"]
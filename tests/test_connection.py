@@ -0,0 +1,137 @@
+import gzip
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from connection import (
+    DEFAULT_TIMEOUT, ENDPOINT_TIMEOUTS, SUPPORTED_ENCODINGS, TransportAdapter,
+    get_session, transport_stats,
+)
+
+BODY = b"Name: Voter Father Name: Parent Age: 42 Sex: M\n" * 2000
+GZIPPED = gzip.compress(BODY)
+
+
+class GzipHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Encoding", "gzip")
+        if self.path == "/chunked":
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(GZIPPED), 100):
+                chunk = GZIPPED[i:i + 100]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(GZIPPED)))
+            self.end_headers()
+            self.wfile.write(GZIPPED)
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), GzipHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_counts_compressed_bytes_with_content_length(server):
+    session = get_session()
+    assert session.get(f"{server}/sized").content == BODY
+    assert transport_stats(session)["bytes_on_wire"] == len(GZIPPED)
+
+
+def test_counts_chunked_bytes(server):
+    session = get_session()
+    assert session.get(f"{server}/chunked").content == BODY
+    # Compressed payload plus chunk-size lines and terminators
+    assert len(GZIPPED) < transport_stats(session)["bytes_on_wire"] < len(GZIPPED) + 300
+
+
+def test_streamed_body_counted_once_read(server):
+    session = get_session()
+    response = session.get(f"{server}/sized", stream=True)
+    assert transport_stats(session)["bytes_on_wire"] == 0
+    assert b"".join(response.iter_content(8192)) == BODY
+    stats = transport_stats(session)
+    assert stats["bytes_on_wire"] == len(GZIPPED)
+    assert stats["requests"] == 1
+
+
+def test_threads_reuse_one_connection_each(server):
+    threads, per_thread = 4, 25
+    session = get_session(pool_maxsize=threads)
+
+    def fetch(_):
+        for _ in range(per_thread):
+            assert session.get(f"{server}/sized").content == BODY
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(fetch, range(threads)))
+
+    stats = transport_stats(session)
+    assert stats["requests"] == threads * per_thread
+    assert stats["connections"] <= threads
+    assert stats["reuse_ratio"] >= 1 - threads / (threads * per_thread)
+
+
+@pytest.fixture
+def sent_timeouts(monkeypatch):
+    """Records the timeout TransportAdapter hands to HTTPAdapter.send, without any network."""
+    timeouts = []
+
+    def fake_send(self, request, timeout=None, **kwargs):
+        timeouts.append(timeout)
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    monkeypatch.setattr(HTTPAdapter, "send", fake_send)
+    return timeouts
+
+
+def test_endpoint_timeout_from_form_body(sent_timeouts):
+    request = requests.Request(
+        "POST", "https://tsec.example/report.do", data={"mode": "createViewInEnglishReport", "ward_id": "7"}
+    ).prepare()
+    TransportAdapter().send(request)
+    assert sent_timeouts == [ENDPOINT_TIMEOUTS["createViewInEnglishReport"]]
+
+
+def test_endpoint_timeout_from_query_and_fallbacks(sent_timeouts):
+    adapter = TransportAdapter()
+    adapter.send(requests.Request("GET", "https://tsec.example/x.do?mode=getWardWiseData").prepare())
+    adapter.send(requests.Request("GET", "https://tsec.example/x.do?mode=unknown").prepare())
+    adapter.send(requests.Request("GET", "https://tsec.example/x.do?mode=getWard").prepare(), timeout=5)
+    assert sent_timeouts == [ENDPOINT_TIMEOUTS["getWardWiseData"], DEFAULT_TIMEOUT, 5]
+
+
+def importable(*modules):
+    for module in modules:
+        try:
+            importlib.import_module(module)
+            return True
+        except ImportError:
+            pass
+    return False
+
+
+def test_accept_encoding_lists_only_decodable_encodings():
+    encodings = {e.strip() for e in SUPPORTED_ENCODINGS.split(",")}
+    assert {"gzip", "deflate"} <= encodings
+    assert ("br" in encodings) == importable("brotlicffi", "brotli")
+    assert ("zstd" in encodings) == importable("compression.zstd", "backports.zstd")
+    assert get_session().headers["Accept-Encoding"] == SUPPORTED_ENCODINGS
@@ -0,0 +1,62 @@
+import threading
+
+import pytest
+
+from jobs import JobService
+
+
+@pytest.fixture
+def service():
+    service = JobService(max_workers=2)
+    yield service
+    service.shutdown()
+
+
+def test_identical_submits_coalesce_onto_one_job(service):
+    release = threading.Event()
+    calls = []
+
+    def work(job, value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    first = service.submit("key", work, 21)
+    second = service.submit("key", work, 21)
+    assert second is first
+    assert first.subscribers == 2
+    assert service.active_jobs() == [first]
+
+    release.set()
+    assert first.result() == 42
+    assert calls == [21]
+    assert service.stats["coalesced"] == 1
+    assert service.stats["submitted"] == 1
+
+
+def test_finished_job_is_not_joined(service):
+    first = service.submit("key", lambda job: "first")
+    first.result()
+    second = service.submit("key", lambda job: "second")
+    assert second is not first
+    assert second.result() == "second"
+
+
+def test_worker_exception_is_raised_from_result(service):
+    def fail(job):
+        raise ValueError("boom")
+
+    job = service.submit("bad", fail)
+    with pytest.raises(ValueError, match="boom"):
+        job.result()
+    assert job.status == "failed"
+
+
+def test_leave_decrements_subscribers(service):
+    release = threading.Event()
+    job = service.submit("key", lambda job: release.wait(5))
+    service.submit("key", lambda job: None)
+    job.leave()
+    assert job.subscribers == 1
+    release.set()
+    job.result()
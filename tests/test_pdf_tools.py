@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+import pdf_tools
+from pdf_tools import count_pages, merge_pdfs, parse_pages
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Rolls built by fixtures/make_rolls.py: ward 7 is 3 columns x 10 rows over
+# two pages, ward 8 is 2 columns x 12 rows on the same page size
+WARD7 = ("voterlist_ward7_part1.pdf", 60)
+WARD8 = ("voterlist_ward8_part1.pdf", 24)
+
+
+@pytest.fixture(autouse=True)
+def fresh_grid_cache():
+    pdf_tools._grid_cache.clear()
+    yield
+    pdf_tools._grid_cache.clear()
+
+
+def parse(filename, mode="grid"):
+    path = os.path.join(FIXTURES, filename)
+    voters, error = parse_pages(filename, path, 0, count_pages(path), mode=mode)
+    assert error is None
+    return voters
+
+
+@pytest.mark.parametrize("filename, expected", [WARD7, WARD8])
+def test_grid_extracts_every_card(filename, expected):
+    voters = parse(filename)
+    assert len(voters) == expected
+    assert [int(v["SL No"]) for v in voters] == list(range(1, expected + 1))
+    for v in voters:
+        assert v["Name"] == f"VOTER{v['SL No']} KUMAR"
+        assert v["Father/Husband Name"] == f"FATHER{v['SL No']} RAO"
+        assert v["EPIC No"].endswith(f"{int(v['SL No']):06d}")
+        assert 18 <= v["Age"] <= 90 and v["Sex"] in ("M", "F")
+
+
+def test_text_mode_garbles_multi_column_rolls():
+    grid = parse(WARD7[0])
+    text = parse(WARD7[0], mode="text")
+    assert len(text) < len(grid) == WARD7[1]
+
+
+def test_cached_grid_rechecked_for_new_layout():
+    # Same page size, different card grid, fewer cards than the cached grid holds
+    assert len(parse(WARD7[0])) == WARD7[1]
+    voters = parse(WARD8[0])
+    assert len(voters) == WARD8[1]
+    assert {v["Ward"] for v in voters} == {"8"}
+    assert [int(v["SL No"]) for v in voters] == list(range(1, WARD8[1] + 1))
+
+
+def test_merge_replaces_output_atomically(tmp_path):
+    paths = [os.path.join(FIXTURES, WARD7[0]), os.path.join(FIXTURES, WARD8[0])]
+    out_path = str(tmp_path / "merged.pdf")
+    assert merge_pdfs(paths, out_path) == out_path
+    assert count_pages(out_path) == 3
+
+    # A failed merge leaves the earlier output and no temp file behind
+    with pytest.raises(Exception):
+        merge_pdfs(paths + [str(tmp_path / "missing.pdf")], out_path)
+    assert count_pages(out_path) == 3
+    assert os.listdir(tmp_path) == ["merged.pdf"]
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import (
+    HISTORY_ALPHA, TimingHistory, WorkStealingScheduler,
+    lpt_makespan, measured_makespan, naive_makespan, synthetic_workload,
+)
+
+
+def worker_name():
+    return threading.current_thread().name
+
+
+def test_follow_up_tasks_run_before_run_returns():
+    sched = WorkStealingScheduler({"download": (2, ()), "parse": (2, ())})
+
+    def discover(n):
+        for i in range(n):
+            sched.submit("download", ("download", i), 1.0, download, i)
+        return n
+
+    def download(i):
+        sched.submit("parse", ("parse", i), 1.0, lambda: i * 10)
+        return i
+
+    sched.submit("download", "discover", 1.0, discover, 5, rank=0)
+    results = sched.run()
+
+    assert results["discover"] == 5
+    assert [results[("download", i)] for i in range(5)] == list(range(5))
+    assert [results[("parse", i)] for i in range(5)] == [i * 10 for i in range(5)]
+    assert not sched.errors
+
+
+def test_failing_task_does_not_stall_other_workers():
+    sched = WorkStealingScheduler({"download": (3, ())})
+
+    def boom():
+        raise ValueError("bad part")
+
+    sched.submit("download", "bad", 5.0, boom)
+    for i in range(10):
+        sched.submit("download", i, 1.0, time.sleep, 0.01)
+
+    finished = threading.Event()
+    threading.Thread(target=lambda: (sched.run(), finished.set()), daemon=True).start()
+    assert finished.wait(5)
+    assert isinstance(sched.errors["bad"], ValueError)
+    assert set(sched.results) == set(range(10))
+
+
+def test_download_workers_steal_parse_but_not_the_reverse():
+    sched = WorkStealingScheduler({"download": (2, ("parse",)), "parse": (1, ())})
+    for i in range(8):
+        sched.submit("parse", ("parse", i), 1.0, lambda: (time.sleep(0.05), worker_name())[1])
+    for i in range(8):
+        sched.submit("download", ("download", i), 1.0, lambda: (time.sleep(0.05), worker_name())[1])
+    results = sched.run()
+
+    download_ran_on = {results[("download", i)] for i in range(8)}
+    parse_ran_on = {results[("parse", i)] for i in range(8)}
+    assert all(name.startswith("sched-download-") for name in download_ran_on)
+    assert any(name.startswith("sched-download-") for name in parse_ran_on)
+    assert sched.steals > 0
+
+
+def test_largest_first_beats_dict_order():
+    workload = synthetic_workload(seed=0)
+    naive = naive_makespan(workload, 4)
+    lpt = lpt_makespan(workload, 4)
+    measured = measured_makespan(workload, 4, time_scale=0.001)
+    assert lpt < naive
+    assert measured < 0.6 * naive
+    # Within sleep and thread-switch overhead of the ideal largest-first schedule
+    assert measured < 1.25 * lpt
+
+
+def test_timing_history_round_trip(tmp_path):
+    path = str(tmp_path / "timings.json")
+    history = TimingHistory(path)
+    history.record("download", 4.0, 2)
+    history.record("download", 12.0, 3)
+    history.record("parse", 5.0, 0)
+    history.set_ward_parts(3, "7", 4)
+    history.set_muni_wards(3, ["7", "8"])
+    history.save()
+
+    expected = 2.0 + HISTORY_ALPHA * (4.0 - 2.0)
+    loaded = TimingHistory(path)
+    assert loaded.per_part("download") == pytest.approx(expected)
+    # Zero-part records are ignored; unknown stages use the defaults
+    assert loaded.per_part("parse") == history.per_part("parse")
+    assert loaded.ward_parts(3, "7") == 4
+    assert loaded.muni_parts(3) == 4 + loaded.ward_parts(3, "8")
+    assert [p.name for p in tmp_path.iterdir()] == ["timings.json"]
+
+
+def test_timing_history_ignores_corrupt_file(tmp_path):
+    path = tmp_path / "timings.json"
+    path.write_text("{not json")
+    assert TimingHistory(str(path)).muni_parts(3) is None
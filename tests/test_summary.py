@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+
+from summary import AGE_LABELS, SummaryAccumulator, batch_counts
+
+
+def voters(n=None):
+    records = [
+        {"Ward": "1", "Age": 17, "Sex": "M", "Door No": "1-1"},
+        {"Ward": "1", "Age": 18, "Sex": "F", "Door No": "1-1"},
+        {"Ward": "1", "Age": 25, "Sex": "M", "Door No": "1-1"},
+        {"Ward": "1", "Age": 26, "Sex": "F", "Door No": "1-2"},
+        {"Ward": "2", "Age": 59, "Sex": "f", "Door No": "1-1"},
+        {"Ward": "2", "Age": 60, "Sex": "M", "Door No": "2-5"},
+        {"Ward": "2", "Age": 84, "Sex": "F", "Door No": "2-5"},
+    ]
+    return records[:n]
+
+
+@pytest.mark.parametrize("age, band", [
+    (17, None), (18, "18-25"), (25, "18-25"), (26, "26-35"), (59, "46-59"), (60, "60+"),
+])
+def test_age_band_edges(age, band):
+    counts = batch_counts(pd.DataFrame([{"Ward": "1", "Age": age, "Sex": "M"}]))
+    row = counts.loc["1", AGE_LABELS]
+    assert row.sum() == (0 if band is None else 1)
+    if band is not None:
+        assert row[band] == 1
+
+
+def test_batch_without_sex_or_age():
+    counts = batch_counts(pd.DataFrame([{"Ward": "1", "Age": 30}, {"Ward": "1", "Age": 40}]))
+    assert counts.loc["1", "Voters"] == 2
+    assert counts.loc["1", "Male"] == counts.loc["1", "Female"] == 0
+    assert counts.loc["1", "Age Sum"] == 70
+
+    counts = batch_counts(pd.DataFrame([{"Ward": "1", "Sex": "M"}, {"Ward": "1", "Sex": "F"}]))
+    assert counts.loc["1", "Male"] == counts.loc["1", "Female"] == 1
+    assert counts.loc["1", "Age Count"] == 0
+    assert counts.loc["1", AGE_LABELS].sum() == 0
+
+
+def test_batches_add_up_to_one_batch():
+    whole = SummaryAccumulator()
+    whole.add(voters())
+    split = SummaryAccumulator()
+    split.add(voters(3))
+    split.add(pd.DataFrame(voters()[3:]))
+    pd.testing.assert_frame_equal(split.result(), whole.result())
+
+
+def test_all_wards_row():
+    summary = SummaryAccumulator()
+    summary.add(voters())
+    result = summary.result().set_index("Ward")
+
+    assert list(result.index) == ["1", "2", "All Wards"]
+    total = result.loc["All Wards"]
+    assert total["Voters"] == 7
+    assert total["Male"] == 3 and total["Female"] == 4
+    # Door keys are per ward: "1-1" in ward 1 and in ward 2 are different doors
+    assert total["Doors"] == 4
+    assert total["Max Voters at a Door"] == 3
+    assert result.loc["2", "Max Voters at a Door"] == 2
+    assert total["Voters per Door"] == 1.75